@@ -0,0 +1,152 @@
+import timeit
+
+import numpy as np
+import pandas as pd
+from grids import chamfer_distance, distance_grid, distance_window, modified_distance
+from helpers import get_df, get_dfs
+from spatial import SpatialIndex
+
+
+def legacy_distance_frame(size):
+    """Original cell-by-cell fill used by range_matrix and movement_matrix."""
+
+    def modified_distance(x1, y1, x2, y2):
+        dx, dy = abs(x1 - x2), abs(y1 - y2)
+        diagonal = min(dx, dy)
+        straight = (dx + dy) - 2 * diagonal
+        return (diagonal * 4) + (straight * 3)
+
+    center = size // 2
+    df = pd.DataFrame(
+        index=range(-center, center + 1), columns=range(-center, center + 1)
+    )
+    for i in df.index:
+        for j in df.columns:
+            df.at[i, j] = modified_distance(i, j, 0, 0)
+    return df
+
+
+def vectorized_distance_frame(size):
+    center = size // 2
+    return pd.DataFrame(
+        distance_grid(size),
+        index=range(-center, center + 1),
+        columns=range(-center, center + 1),
+    )
+
+
+def best_of(func, repeat=3, number=1):
+    """Best wall time in seconds of func() over repeat runs."""
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+
+def bench_distance_grid(sizes=(30, 100, 500)):
+    """Compare the legacy loop against distance_grid for each grid size."""
+    rows = []
+    for size in sizes:
+        legacy = best_of(lambda: legacy_distance_frame(size), repeat=1)
+        vectorized = best_of(lambda: vectorized_distance_frame(size))
+        side = 2 * (size // 2) + 1
+        rows.append(
+            {
+                "grid": f"{side}x{side}",
+                "legacy_s": legacy,
+                "vectorized_s": vectorized,
+                "speedup": legacy / vectorized,
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def bench_slider_scrub(ms_values=range(1, 21)):
+    """Cost of serving walk/run/sprint grids for every ms slider value."""
+    sizes = [
+        (ms if action == "walk" else (2 * ms if action == "run" else 4 * ms)) + 3
+        for ms in ms_values
+        for action in ("walk", "run", "sprint")
+    ]
+    rebuild = best_of(lambda: [distance_grid(size) for size in sizes])
+    windowed = best_of(lambda: [distance_window(size) for size in sizes])
+    return pd.DataFrame(
+        [{"rebuild_s": rebuild, "windowed_s": windowed, "speedup": rebuild / windowed}]
+    )
+
+
+def bench_sheet_reads(client, sheet, worksheets):
+    """One get_df per worksheet against one batched get_dfs.
+
+    Pass a replica.ReplicaClient to benchmark offline against a local
+    stand-in of the spreadsheet service.
+    """
+    sequential = best_of(
+        lambda: [get_df(client, sheet, worksheet) for worksheet in worksheets]
+    )
+    batched = best_of(lambda: get_dfs(client, sheet, worksheets))
+    return pd.DataFrame(
+        [
+            {
+                "sequential_s": sequential,
+                "batched_s": batched,
+                "speedup": sequential / batched,
+            }
+        ]
+    )
+
+
+def bench_chamfer(shape=(500, 500), units=(10, 50, 200), seed=0):
+    """Nearest-unit distance field: one pass per unit against the chamfer transform."""
+    rng = np.random.default_rng(seed)
+    rows, cols = np.indices(shape)
+    results = []
+    for n in units:
+        sources = np.stack([rng.integers(0, size, n) for size in shape], axis=1)
+        per_unit = best_of(
+            lambda: np.min(
+                [modified_distance(rows - r, cols - c) for r, c in sources], axis=0
+            ),
+            repeat=1,
+        )
+        chamfer = best_of(lambda: chamfer_distance(shape, sources))
+        results.append(
+            {
+                "units": n,
+                "per_unit_s": per_unit,
+                "chamfer_s": chamfer,
+                "speedup": per_unit / chamfer,
+            }
+        )
+    return pd.DataFrame(results)
+
+
+def bench_targets(units=(100, 1000, 5000), extent=1000, seed=0):
+    """Range-band targets of every unit: all pairs against the spatial index."""
+    rng = np.random.default_rng(seed)
+    results = []
+    for n in units:
+        positions = rng.integers(0, extent, (n, 2))
+
+        def all_pairs():
+            offset = positions[:, None, :] - positions[None, :, :]
+            distance = modified_distance(offset[..., 0], offset[..., 1])
+            return np.nonzero(distance <= 50)
+
+        brute = best_of(all_pairs, repeat=1)
+        indexed = best_of(
+            lambda: SpatialIndex(positions).targets_many(np.arange(n)), repeat=1
+        )
+        results.append(
+            {
+                "units": n,
+                "all_pairs_s": brute,
+                "indexed_s": indexed,
+                "speedup": brute / indexed,
+            }
+        )
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    print(bench_distance_grid())
+    print(bench_slider_scrub())
+    print(bench_chamfer())
+    print(bench_targets())
@@ -0,0 +1,175 @@
+import heapq
+
+import numpy as np
+import pandas as pd
+from engine import action_label
+from rules import (
+    ACTION_CODES,
+    ATT,
+    DMG,
+    MAX_AP,
+    STA_COST,
+    VALID,
+    ap_penalty,
+    ap_points,
+    movement,
+    stamina_penalty,
+)
+
+FIELDS = (
+    "sta",
+    "init_sta",
+    "ms",
+    "initiative",
+    "current_AP",
+    "last_turn_AP",
+    "consecutive_passes",
+)
+
+
+class Encounter:
+    """Turn state of many combatants as parallel arrays.
+
+    Every combatant is a row index into the arrays in FIELDS. Activations
+    within a round come from a heap ordered by initiative (ties by joining
+    order), and end_round applies AP carry-over, STA penalties and rest
+    regen to everyone with a few array operations.
+    """
+
+    def __init__(self):
+        self.names = []
+        for field in FIELDS:
+            setattr(self, field, np.zeros(0, dtype=np.int32))
+        self.turn_counter = 1
+        self.log = []
+        self.queue = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name, sta=10, ms=10, init_sta=None, initiative=0):
+        """Adds a combatant, queued for the current round, and returns its index."""
+        index = len(self.names)
+        values = {
+            "sta": sta,
+            "init_sta": sta if init_sta is None else init_sta,
+            "ms": ms,
+            "initiative": initiative,
+            "current_AP": MAX_AP,
+            "last_turn_AP": 0,
+            "consecutive_passes": 0,
+        }
+        for field in FIELDS:
+            column = np.append(getattr(self, field), values[field])
+            setattr(self, field, column.astype(np.int32))
+        self.names.append(name)
+        heapq.heappush(self.queue, (-initiative, index))
+        return index
+
+    def start_round(self):
+        """Queues every combatant by initiative."""
+        self.queue = [
+            (-initiative, index) for index, initiative in enumerate(self.initiative)
+        ]
+        heapq.heapify(self.queue)
+
+    def next_up(self):
+        """Index of the next combatant to activate, None when the round is done."""
+        return heapq.heappop(self.queue)[1] if self.queue else None
+
+    def delay(self, index, initiative):
+        """Puts a combatant back in the queue at a lower initiative."""
+        heapq.heappush(self.queue, (-initiative, index))
+
+    def do_action(self, index, action, ap):
+        """Plays action for ap as combatant index and returns its record.
+
+        Same rules as TurnEngine.do_action: None when there is not enough
+        stamina, ValueError when the action cannot be played for ap.
+        """
+        code, points = ACTION_CODES.get(action), ap_points(ap)
+        if code is None or not VALID[code, points] or points > self.current_AP[index]:
+            raise ValueError(f"{action} cannot be played for {ap}")
+
+        cost = int(
+            STA_COST[code, points]
+            + ap_penalty(self.current_AP[index], self.last_turn_AP[index])
+        )
+        if self.sta[index] < cost:
+            return None
+
+        ms = int(movement(self.ms[index], code, points, self.sta[index]))
+        self.sta[index] -= cost
+        self.current_AP[index] -= points
+
+        record = {
+            "ACTION": action,
+            "AP": ap,
+            "MS": ms,
+            "STA": cost,
+            "ATT": int(ATT[code] - stamina_penalty(self.sta[index])),
+            "DMG": int(DMG[code]),
+        }
+        self.log.append((index, record))
+        return record
+
+    def undo_action(self, index=None):
+        """Undoes the latest action of this round, of combatant index if given."""
+        for position in range(len(self.log) - 1, -1, -1):
+            if index is None or self.log[position][0] == index:
+                index, record = self.log.pop(position)
+                self.current_AP[index] += ap_points(record["AP"])
+                self.sta[index] += record["STA"]
+                return index, record
+        return None
+
+    def end_round(self):
+        """Closes the round for everyone and returns per-combatant summary arrays."""
+        ap_played = MAX_AP - self.current_AP
+        ap_sta_penalty = ap_penalty(self.current_AP, self.last_turn_AP)
+        sta_penalty = stamina_penalty(self.sta)
+        spent = np.bincount(
+            [index for index, _ in self.log],
+            weights=[record["STA"] for _, record in self.log],
+            minlength=len(self),
+        ).astype(np.int32)
+
+        passed = ap_played == 0
+        self.consecutive_passes = np.where(passed, self.consecutive_passes + 1, 0)
+        rest_stamina = np.where(self.consecutive_passes == 1, 1, 2) * passed
+        self.sta = np.where(
+            passed, np.minimum(self.sta + rest_stamina, self.init_sta), self.sta
+        ).astype(np.int32)
+
+        summary = {
+            "turn": self.turn_counter,
+            "total_ap_played": ap_played,
+            "ap_sta_penalty": ap_sta_penalty,
+            "sta_ms_penalty": sta_penalty,
+            "sta_att_penalty": sta_penalty,
+            "rest_stamina": rest_stamina,
+            "total_stamina_spent": spent + ap_sta_penalty,
+            "sta": self.sta.copy(),
+            "actions": self.log,
+        }
+
+        self.last_turn_AP = ap_played
+        self.current_AP = np.full(len(self), MAX_AP, dtype=np.int32)
+        self.turn_counter += 1
+        self.log = []
+        self.start_round()
+        return summary
+
+    def frame(self):
+        """Current state of every combatant as a DataFrame indexed by name."""
+        return pd.DataFrame(
+            {field: getattr(self, field) for field in FIELDS},
+            index=pd.Index(self.names, name="name"),
+        )
+
+    def log_labels(self):
+        """Tracker-style labels of this round's actions, most recent first."""
+        return [
+            f"{self.names[index]}: {action_label(record)}"
+            for index, record in reversed(self.log)
+        ]
@@ -0,0 +1,288 @@
+from rules import (
+    ACTION_CODES,
+    AP_OPTIONS,
+    ATT,
+    DMG,
+    MAX_AP,
+    STA_COST,
+    VALID,
+    action_code,
+    ap_penalty,
+    ap_points,
+    movement,
+    stamina_penalty,
+)
+
+
+def compute_stamina_cost(ap, action):
+    return int(STA_COST[action_code(action), ap_points(ap)])
+
+
+def compute_damage_modifier(action):
+    return int(DMG[action_code(action)])
+
+
+def compute_stamina_penalty(sta):
+    penalty = int(stamina_penalty(sta))
+    return {"MS": penalty, "ATT": penalty} if penalty else None
+
+
+def compute_ap_penalty(current_AP, last_turn_AP):
+    penalty = int(ap_penalty(current_AP, last_turn_AP))
+    return {"STA": penalty} if penalty else None
+
+
+def compute_ms(ap, action, ms, sta):
+    return int(movement(ms, action_code(action), ap_points(ap), sta))
+
+
+def compute_attack_rating(action, sta):
+    return int(ATT[action_code(action)] - stamina_penalty(sta))
+
+
+def valid_ap_options(action, current_AP):
+    """AP options the action allows that still fit in current_AP."""
+    options = AP_OPTIONS[:current_AP]
+    if action not in ACTION_CODES:
+        return options
+    code = ACTION_CODES[action]
+    return [ap for ap in options if VALID[code, ap_points(ap)]]
+
+
+def action_label(action):
+    return f"[{action['ACTION']}] {action['AP']} | STA: {action['STA']} | MS: {action['MS']} | ATT: {action['ATT']} | DMG: {action['DMG']}"
+
+
+class NewestFirst:
+    """Read-only view of an insertion-ordered dict's values, newest first.
+
+    Iterating walks the dict backwards, so nothing is copied or rebuilt.
+    """
+
+    __slots__ = ("mapping",)
+
+    def __init__(self, mapping):
+        self.mapping = mapping
+
+    def __len__(self):
+        return len(self.mapping)
+
+    def __iter__(self):
+        return reversed(self.mapping.values())
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return f"NewestFirst({list(self)!r})"
+
+
+class ActionStorage:
+    """Action log of one round keyed by stable ids.
+
+    Appending and removing are O(1); STA, AP and MS totals and the
+    (label, id) dropdown options are kept up to date on every mutation
+    instead of being recomputed from the whole log.
+    """
+
+    __slots__ = (
+        "actions",
+        "labels",
+        "next_id",
+        "total_sta",
+        "total_ap",
+        "total_ms",
+    )
+
+    def __init__(self):
+        self.next_id = 0
+        self.clear_actions()
+
+    def __len__(self):
+        return len(self.actions)
+
+    def add_action(self, action, ap, ms, sta, att, dmg):
+        """Logs an action and returns its id."""
+        action_id = self.next_id
+        self.next_id += 1
+
+        record = {
+            "ACTION": action,
+            "AP": ap,
+            "MS": ms,
+            "STA": sta,
+            "ATT": att,
+            "DMG": dmg,
+        }
+        self.actions[action_id] = record
+        self.labels[action_id] = (action_label(record), action_id)
+        self.total_sta += sta
+        self.total_ap += ap_points(ap)
+        self.total_ms += ms
+        return action_id
+
+    def remove_action(self, action_id):
+        """Removes the action with action_id and returns its record."""
+        record = self.actions.pop(action_id)
+        del self.labels[action_id]
+        self.total_sta -= record["STA"]
+        self.total_ap -= ap_points(record["AP"])
+        self.total_ms -= record["MS"]
+        return record
+
+    def last_id(self):
+        """Id of the most recent action, None when the log is empty."""
+        return next(reversed(self.actions), None)
+
+    def clear_actions(self):
+        # Fresh dicts, so views handed out by get_actions stay intact
+        self.actions = {}
+        self.labels = {}
+        self.total_sta = 0
+        self.total_ap = 0
+        self.total_ms = 0
+
+    def get_actions(self):
+        """Records, most recent first, as a view of the log."""
+        return NewestFirst(self.actions)
+
+    def options(self):
+        """(label, id) dropdown options, most recent first, as a view."""
+        return NewestFirst(self.labels)
+
+
+class CombatantState:
+    """Turn state of a single combatant."""
+
+    __slots__ = (
+        "turn_counter",
+        "current_AP",
+        "last_turn_AP",
+        "sta",
+        "init_sta",
+        "ms",
+        "consecutive_passes",
+        "actions",
+    )
+
+    def __init__(self, sta=10, ms=10, init_sta=None):
+        self.turn_counter = 1
+        self.current_AP = MAX_AP
+        self.last_turn_AP = 0
+        self.sta = sta
+        self.init_sta = sta if init_sta is None else init_sta
+        self.ms = ms
+        self.consecutive_passes = 0
+        self.actions = ActionStorage()
+
+
+class TurnEngine:
+    """Widget-free turn rules driven by the tracker UI, tests and batch jobs.
+
+    init_sta caps the stamina regained by resting and defaults to the
+    starting stamina.
+    """
+
+    __slots__ = ("state",)
+
+    def __init__(self, sta=10, ms=10, init_sta=None):
+        self.state = CombatantState(sta, ms, init_sta)
+
+    def reset(self, sta=None, ms=None):
+        state = self.state
+        self.state = CombatantState(
+            state.sta if sta is None else sta,
+            state.ms if ms is None else ms,
+            state.init_sta,
+        )
+
+    def valid_ap_options(self, action):
+        return valid_ap_options(action, self.state.current_AP)
+
+    def ap_options(self):
+        """AP options left this round, regardless of the action."""
+        return AP_OPTIONS[: self.state.current_AP]
+
+    def stamina_penalty(self):
+        return compute_stamina_penalty(self.state.sta)
+
+    def ap_penalty(self):
+        return compute_ap_penalty(self.state.current_AP, self.state.last_turn_AP)
+
+    def do_action(self, action, ap):
+        """Plays action for ap and returns its record.
+
+        Returns None when there is not enough stamina and raises ValueError
+        when the action cannot be played for ap this round.
+        """
+        state = self.state
+        if ap not in valid_ap_options(action, state.current_AP):
+            raise ValueError(f"{action} cannot be played for {ap}")
+
+        ap_penalty = self.ap_penalty()
+        total_stamina_cost = compute_stamina_cost(ap, action) + (
+            ap_penalty.get("STA", 0) if ap_penalty else 0
+        )
+        if state.sta - total_stamina_cost < 0:
+            return None
+
+        ms = compute_ms(ap, action, state.ms, state.sta)
+        state.sta -= total_stamina_cost
+        state.current_AP -= ap_points(ap)
+        att = compute_attack_rating(action, state.sta)
+        dmg = compute_damage_modifier(action)
+
+        action_id = state.actions.add_action(
+            action, ap, ms, total_stamina_cost, att, dmg
+        )
+        return state.actions.actions[action_id]
+
+    def undo_action(self, action_id=None):
+        """Undoes the action with action_id, the most recent one by default."""
+        state = self.state
+        if action_id is None:
+            action_id = state.actions.last_id()
+        removed_action = state.actions.remove_action(action_id)
+        state.current_AP += ap_points(removed_action["AP"])
+        state.sta += removed_action["STA"]
+        return removed_action
+
+    def end_round(self):
+        """Closes the round, applies rest regen and returns its summary."""
+        state = self.state
+        actions = state.actions.get_actions()
+        total_stamina_spent = state.actions.total_sta
+        total_ap_played = state.actions.total_ap
+
+        ap_penalty = self.ap_penalty()
+        ap_sta_penalty = ap_penalty.get("STA", 0) if ap_penalty else 0
+
+        sta_penalty = self.stamina_penalty()
+        sta_att_penalty = sta_penalty.get("ATT", 0) if sta_penalty else 0
+        sta_ms_penalty = sta_penalty.get("MS", 0) if sta_penalty else 0
+
+        if total_ap_played == 0:
+            state.consecutive_passes += 1
+            rest_stamina = 1 if state.consecutive_passes == 1 else 2
+            state.sta = min(state.sta + rest_stamina, state.init_sta)
+        else:
+            state.consecutive_passes = 0
+            rest_stamina = 0
+
+        summary = {
+            "turn": state.turn_counter,
+            "actions": actions,
+            "total_ap_played": total_ap_played,
+            "ap_sta_penalty": ap_sta_penalty,
+            "sta_ms_penalty": sta_ms_penalty,
+            "sta_att_penalty": sta_att_penalty,
+            "rest_stamina": rest_stamina,
+            "total_stamina_spent": total_stamina_spent + ap_sta_penalty,
+            "sta": state.sta,
+        }
+
+        state.actions.clear_actions()
+        state.last_turn_AP = MAX_AP - state.current_AP
+        state.current_AP = MAX_AP
+        state.turn_counter += 1
+        return summary
@@ -1,12 +1,17 @@
 from IPython.display import display
 import ipywidgets as widgets
-from helpers import get_df
+from helpers import LookupTable, get_dfs
+from sync import debounce, synced
 
 
 def get_selector(id, dataframe, column, selection):
     """Test"""
-    has_max_stack = "Stack" in dataframe.columns
-    options = dataframe[column]
+    if isinstance(dataframe, LookupTable):
+        table = dataframe
+    else:
+        table = LookupTable(dataframe, column)
+    has_max_stack = "Stack" in table.columns
+    options = table.options(column)
 
     dropdown = widgets.Dropdown(
         options=options,
@@ -31,6 +36,9 @@ def get_selector(id, dataframe, column, selection):
 
     button = widgets.Button(description="Reset")
 
+    controls = [slider, label] if has_max_stack else [label]
+
+    @synced(controls)
     def update_dropdown(change):
         if change["name"] == "label":
             new_value = change["new"]
@@ -39,12 +47,11 @@ def get_selector(id, dataframe, column, selection):
                 if not has_max_stack:
                     selection[new_value] = (True, id)
                 else:
+                    max_stack = table.get(new_value, "Stack")
                     slider.value = 0
                     slider.disabled = False
-                    slider.max = dataframe.loc[
-                        dataframe[column] == new_value, "Stack"
-                    ].values[0]
-                    label.value = f"max stack: {slider.max}"
+                    slider.max = max_stack
+                    label.value = f"max stack: {max_stack}"
                     selection[new_value] = (slider.value, id)
             else:
                 if has_max_stack:
@@ -54,9 +61,7 @@ def get_selector(id, dataframe, column, selection):
             if old_value is not None:
                 del selection[old_value]
 
-            # %clear
-            print(selection)
-
+    @synced([dropdown, label])
     def reset_dropdown(button):
         dropdown.value = None
         label.value = ""
@@ -66,16 +71,12 @@ def get_selector(id, dataframe, column, selection):
 
     if has_max_stack:
 
+        # Dragging fires a change per step; only the resting value counts
+        @debounce(0.2)
         def update_slider(change):
-            if change["name"] == "value":
-                slider.value = change["new"]
-
             if dropdown.value:
                 selection[dropdown.value] = (slider.value, id)
 
-            # %clear
-            print(selection)
-
         slider.observe(update_slider)
         box = widgets.HBox([dropdown, slider, button, label])
     else:
@@ -90,98 +91,70 @@ def get_selector(id, dataframe, column, selection):
 
 
 def modifiers_selection(
-    client, traits_selection, attributes_selection, items_selection
+    client, traits_selection, attributes_selection, items_selection, cache=None
 ):
-    traits = widgets.Output()
-    with traits:
-        traits_df = get_df(client, "test", "traits").sort_values(by="Name")
-
-        trait_name_1, trait_stack_1 = get_selector(
-            "trait_1", traits_df, "Name", traits_selection
-        )
-        trait_name_2, trait_stack_2 = get_selector(
-            "trait_2", traits_df, "Name", traits_selection
-        )
-        trait_name_3, trait_stack_3 = get_selector(
-            "trait_3", traits_df, "Name", traits_selection
-        )
-        trait_name_4, trait_stack_4 = get_selector(
-            "trait_4", traits_df, "Name", traits_selection
-        )
-        trait_name_5, trait_stack_5 = get_selector(
-            "trait_5", traits_df, "Name", traits_selection
-        )
-        trait_name_6, trait_stack_6 = get_selector(
-            "trait_6", traits_df, "Name", traits_selection
-        )
-        trait_name_7, trait_stack_7 = get_selector(
-            "trait_7", traits_df, "Name", traits_selection
-        )
-
-    attributes = widgets.Output()
-    with attributes:
-        attributes_df = get_df(client, "test", "attributes").sort_values(by="Name")
-
-        attribute_name_1, attribute_stack_1 = get_selector(
-            "attribute_1", attributes_df, "Name", attributes_selection
-        )
-        attribute_name_2, attribute_stack_2 = get_selector(
-            "attribute_2", attributes_df, "Name", attributes_selection
-        )
-        attribute_name_3, attribute_stack_3 = get_selector(
-            "attribute_3", attributes_df, "Name", attributes_selection
-        )
-        attribute_name_4, attribute_stack_4 = get_selector(
-            "attribute_4", attributes_df, "Name", attributes_selection
-        )
-        attribute_name_5, attribute_stack_5 = get_selector(
-            "attribute_5", attributes_df, "Name", attributes_selection
-        )
-        attribute_name_6, attribute_stack_6 = get_selector(
-            "attribute_6", attributes_df, "Name", attributes_selection
-        )
-        attribute_name_7, attribute_stack_7 = get_selector(
-            "attribute_7", attributes_df, "Name", attributes_selection
-        )
-
-    items = widgets.Output()
-    with items:
-        items_df = get_df(client, "test", "items").sort_values(by="Name")
-
-        head_eq, head_eq_stack = get_selector(
-            "head_eq", items_df, "Name", items_selection
-        )
-        torso_eq, torso_eq_stack = get_selector(
-            "torso_eq", items_df, "Name", items_selection
-        )
-        arms_eq, arms_estack_q = get_selector(
-            "arms_eq", items_df, "Name", items_selection
-        )
-        legs_eq, legs_estack_q = get_selector(
-            "legs_eq", items_df, "Name", items_selection
-        )
-        wpn_eq_1, wpn_eq_stack_1 = get_selector(
-            "wpn_eq_1", items_df, "Name", items_selection
-        )
-        wpn_eq_2, wpn_eq_stack_2 = get_selector(
-            "wpn_eq_2", items_df, "Name", items_selection
-        )
-        item_name_1, item_stack_1 = get_selector(
-            "item_1", items_df, "Name", attributes_selection
-        )
-        item_name_2, item_stack_2 = get_selector(
-            "item_2", items_df, "Name", attributes_selection
-        )
-        item_name_3, item_stack_3 = get_selector(
-            "item_3", items_df, "Name", attributes_selection
-        )
+    """Trait, attribute and item selector tabs of the character builder.
+
+    A tab's selectors are built the first time it is selected; all slots of
+    one tab share the options tuple of its LookupTable.
+    """
+    dfs = get_dfs(client, "test", ["traits", "attributes", "items"], cache)
+
+    # (title, worksheet, [(slot id, selection dict), ...]) per tab
+    pages = [
+        (
+            "Traits",
+            "traits",
+            [(f"trait_{i}", traits_selection) for i in range(1, 8)],
+        ),
+        (
+            "Attributes",
+            "attributes",
+            [(f"attribute_{i}", attributes_selection) for i in range(1, 8)],
+        ),
+        (
+            "Items",
+            "items",
+            [
+                (slot, items_selection)
+                for slot in (
+                    "head_eq",
+                    "torso_eq",
+                    "arms_eq",
+                    "legs_eq",
+                    "wpn_eq_1",
+                    "wpn_eq_2",
+                )
+            ]
+            + [(f"item_{i}", attributes_selection) for i in range(1, 4)],
+        ),
+    ]
+
+    outputs = [widgets.Output() for _ in pages]
+    built = set()
+
+    def build_tab(index):
+        if index is None or index in built:
+            return
+        built.add(index)
+
+        title, worksheet, slots = pages[index]
+        table = LookupTable(dfs[worksheet].sort_values(by="Name"))
+        with outputs[index]:
+            for id, selection in slots:
+                get_selector(id, table, "Name", selection)
+
+    def on_tab_selected(change):
+        build_tab(change["new"])
 
     tabs = widgets.Tab()
-    tabs.children = [traits, attributes, items]
+    tabs.children = outputs
 
     # Set tab titles
-    tabs.set_title(0, "Traits")
-    tabs.set_title(1, "Attributes")
-    tabs.set_title(2, "Items")
+    for index, (title, _, _) in enumerate(pages):
+        tabs.set_title(index, title)
+
+    tabs.observe(on_tab_selected, names="selected_index")
+    build_tab(tabs.selected_index)
 
     display(tabs)
@@ -0,0 +1,226 @@
+import html
+import struct
+import zlib
+
+import numpy as np
+import pandas as pd
+
+LGREEN = "#A4D682"
+DGREEN = "#6B7823"
+BLUE = "#4078A4"
+ORANGE = "#FF8C00"
+RED = "#FF5050"
+
+MELEE = 3
+REACHING = 6
+SHORT = 10
+MID = 30
+LONG = 50
+
+RANGE_BANDS = [MELEE, REACHING, SHORT, MID, LONG]
+
+
+def grid_dtype(max_value):
+    """Smallest signed integer dtype that holds distances up to max_value."""
+    return np.int16 if max_value <= np.iinfo(np.int16).max else np.int32
+
+
+def modified_distance(dx, dy):
+    """4/3 diagonal distance for scalar or array offsets.
+
+    Every diagonal step costs 4 and every straight step costs 3, which
+    reduces to 3 * max(|dx|, |dy|) + min(|dx|, |dy|).
+    """
+    dx, dy = np.abs(dx), np.abs(dy)
+    return 3 * np.maximum(dx, dy) + np.minimum(dx, dy)
+
+
+def distance_grid(size):
+    """Modified distances from the centre of a grid spanning -size//2..size//2.
+
+    The grid always has an odd side of 2 * (size // 2) + 1 cells, matching the
+    index used by range_matrix and movement_matrix.
+    """
+    center = size // 2
+    dtype = grid_dtype(4 * center)
+
+    axis = np.abs(np.arange(-center, center + 1, dtype=dtype))
+    return modified_distance(axis[:, None], axis[None, :]).astype(dtype, copy=False)
+
+
+_master = distance_grid(0)
+_master.flags.writeable = False
+
+
+def master_field(center):
+    """Shared read-only distance field covering at least -center..center.
+
+    The field is computed once and regrown (at least doubling) only when a
+    larger window is requested, so callers never pay for a rebuild.
+    """
+    global _master
+    current = _master.shape[0] // 2
+    if center > current:
+        _master = distance_grid(2 * max(center, 2 * current))
+        _master.flags.writeable = False
+    return _master
+
+
+def distance_window(size):
+    """Zero-copy centred view of the master field with the distance_grid shape."""
+    center = size // 2
+    field = master_field(center)
+    offset = field.shape[0] // 2 - center
+    return field[offset : offset + 2 * center + 1, offset : offset + 2 * center + 1]
+
+
+def classify(values, thresholds):
+    """Band of every value: the first i with value <= thresholds[i].
+
+    Values above every threshold fall in band len(thresholds). This is the
+    if-ladder of the old per-cell highlighters, run once for the whole grid.
+    """
+    # The running maximum keeps the first-match semantics for unsorted ladders
+    edges = np.maximum.accumulate(np.asarray(thresholds))
+    bands = np.searchsorted(edges, values, side="left")
+    return bands.astype(np.int8 if len(edges) < 127 else np.int16)
+
+
+def band_css(colors):
+    """CSS lookup indexed by band, the last entry leaves a cell unstyled."""
+    return np.array([f"background-color: {color}" for color in colors] + [""])
+
+
+def style_bands(df, bands, colors):
+    """Styler colouring df by its band matrix in one whole-frame pass."""
+    css = pd.DataFrame(band_css(colors)[bands], index=df.index, columns=df.columns)
+    return df.style.apply(lambda _: css, axis=None)
+
+
+def bands_to_html(df, bands, colors):
+    """HTML table of df coloured by its band matrix, without a Styler.
+
+    Cells reference one CSS class per band instead of inline styles, which
+    keeps the payload small for large grids.
+    """
+    style = "".join(
+        f".band-table .b{band}{{background-color:{color}}}"
+        for band, color in enumerate(colors)
+    )
+    cells = np.char.add(
+        np.char.add(np.char.add('<td class="b', bands.astype(str)), '">'),
+        np.char.add(df.to_numpy().astype(str), "</td>"),
+    )
+
+    header_levels = (
+        [df.columns.get_level_values(level) for level in range(df.columns.nlevels)]
+        if isinstance(df.columns, pd.MultiIndex)
+        else [df.columns]
+    )
+    header = "".join(
+        "<tr><th></th>"
+        + "".join(f"<th>{html.escape(str(label))}</th>" for label in labels)
+        + "</tr>"
+        for labels in header_levels
+    )
+    body = "".join(
+        f"<tr><th>{html.escape(str(label))}</th>{''.join(row)}</tr>"
+        for label, row in zip(df.index, cells)
+    )
+    return (
+        f"<style>{style}</style>"
+        f'<table class="band-table"><thead>{header}</thead><tbody>{body}</tbody></table>'
+    )
+
+
+def hex_to_rgb(color):
+    color = color.lstrip("#")
+    return tuple(int(color[i : i + 2], 16) for i in (0, 2, 4))
+
+
+def bands_to_rgb(bands, colors, background="#FFFFFF", zoom=1, crop=None):
+    """RGB image of a band matrix, one zoom x zoom pixel block per cell.
+
+    crop is (top, left, bottom, right) in cells, bottom and right exclusive.
+    Unbanded cells get the background colour.
+    """
+    if crop is not None:
+        top, left, bottom, right = crop
+        bands = bands[top:bottom, left:right]
+    palette = np.array([hex_to_rgb(c) for c in colors] + [hex_to_rgb(background)])
+    image = palette.astype(np.uint8)[np.minimum(bands, len(colors))]
+    if zoom > 1:
+        image = image.repeat(zoom, axis=0).repeat(zoom, axis=1)
+    return image
+
+
+def encode_png(image, level=6):
+    """PNG bytes of an (height, width, 3) uint8 RGB array."""
+    height, width, _ = image.shape
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)  # filter byte 0
+    rows[:, 1:] = image.reshape(height, width * 3)
+
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows.tobytes(), level))
+        + chunk(b"IEND", b"")
+    )
+
+
+def bands_to_png(bands, colors, zoom=1, crop=None):
+    return encode_png(bands_to_rgb(bands, colors, zoom=zoom, crop=crop))
+
+
+FAR = np.iinfo(np.int32).max // 2
+
+
+def _chamfer_row(dist, labels, row):
+    """One row of a chamfer pass: the 4-3-4 terms from the row above, then
+    the 3-per-cell propagation along the row as a running minimum."""
+    current, current_labels = dist[row], labels[row]
+    if row:
+        above, above_labels = dist[row - 1], labels[row - 1]
+        # Diagonals through one-cell shifts of the row above, padded with FAR
+        padded = np.concatenate(([FAR], above, [FAR]))
+        padded_labels = np.concatenate(([-1], above_labels, [-1]))
+        for start, step in ((1, 3), (0, 4), (2, 4)):
+            candidate = padded[start : start + len(current)] + step
+            better = candidate < current
+            current[better] = candidate[better]
+            current_labels[better] = padded_labels[start : start + len(current)][better]
+
+    positions = np.arange(len(current))
+    offset = current - 3 * positions
+    running = np.minimum.accumulate(offset)
+    source = np.maximum.accumulate(np.where(offset == running, positions, 0))
+    current[:] = running + 3 * positions
+    current_labels[:] = current_labels[source]
+
+
+def chamfer_distance(shape, sources, return_labels=False):
+    """4/3 distance from every cell of a grid to the nearest of many sources.
+
+    A two-pass 3-4 chamfer transform, exact for this metric on open ground
+    and O(cells) whatever the number of sources; each row is swept as a
+    vectorized running minimum. sources are (row, col) cells. With
+    return_labels, also returns the index in sources of the nearest one.
+    """
+    sources = np.asarray(sources, dtype=np.intp).reshape(-1, 2)
+    dist = np.full(shape, FAR, dtype=np.int32)
+    labels = np.full(shape, -1, dtype=np.int32)
+    dist[sources[:, 0], sources[:, 1]] = 0
+    labels[sources[:, 0], sources[:, 1]] = np.arange(len(sources))
+
+    # Forward pass top-left to bottom-right, then the same on the flipped grid
+    for grid, grid_labels in ((dist, labels), (dist[::-1, ::-1], labels[::-1, ::-1])):
+        for row in range(shape[0]):
+            _chamfer_row(grid, grid_labels, row)
+
+    if return_labels:
+        return dist, labels
+    return dist
@@ -1,4 +1,21 @@
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
 import pandas as pd
+from definitions import BodyPart
+
+try:
+    import pyarrow  # noqa: F401
+
+    CACHE_FORMAT = "feather"
+except ImportError:
+    CACHE_FORMAT = "pickle"
 
 
 def sum_mods(modifiers, prop):
@@ -6,44 +23,632 @@ def sum_mods(modifiers, prop):
     return sum(modifier[prop] for modifier in modifiers if prop in modifier)
 
 
+class LookupTable:
+    """Hash index on the key column of a loaded sheet.
+
+    Built once per sheet; single lookups are dictionary hits and bulk lookups
+    resolve many names in one vectorized call. The first row wins when a key
+    is duplicated.
+    """
+
+    def __init__(self, dataframe, key="Name"):
+        self.dataframe = dataframe
+        self.key = key
+
+        keys = dataframe[key]
+        first = ~keys.duplicated().to_numpy()
+        self._rows = np.flatnonzero(first)
+        self._index = pd.Index(keys.to_numpy()[first])
+        self._positions = dict(zip(self._index, self._rows))
+        self._arrays = {}
+        self._options = {}
+
+    @property
+    def columns(self):
+        return self.dataframe.columns
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, name):
+        return name in self._positions
+
+    def _column(self, column):
+        if column not in self._arrays:
+            self._arrays[column] = self.dataframe[column].to_numpy()
+        return self._arrays[column]
+
+    def options(self, column=None):
+        """Interned values of column (the key by default) as one shared tuple.
+
+        Every dropdown built from the table reuses the same tuple.
+        """
+        column = self.key if column is None else column
+        if column not in self._options:
+            self._options[column] = tuple(
+                sys.intern(value) if isinstance(value, str) else value
+                for value in self.dataframe[column]
+            )
+        return self._options[column]
+
+    def get(self, name, column="Value"):
+        """Value of column for name, raises KeyError when name is missing."""
+        return self._column(column)[self._positions[name]]
+
+    def get_many(self, names, column="Value"):
+        """Values of column for every name, as an array in the order given."""
+        positions = self._index.get_indexer(names)
+        missing = positions < 0
+        if missing.any():
+            raise KeyError(np.asarray(names)[missing].tolist())
+        return self._column(column)[self._rows[positions]]
+
+
 def get_val(dataframe, name):
     """Uses dataframe as dictionary and get value that corresponds to name."""
+    if isinstance(dataframe, LookupTable):
+        return dataframe.get(name)
     return dataframe.set_index("Name").loc[name, "Value"]
 
 
+def get_vals(table, names):
+    """Bulk get_val: values that correspond to every name in names."""
+    return table.get_many(names)
+
+
+BODY_PARTS = list(BodyPart)
+BODY_PART_CODES = {part: code for code, part in enumerate(BODY_PARTS)}
+
+
+def _body_part(value):
+    """BodyPart of value, None when value is not a known body part."""
+    try:
+        return BodyPart(value)
+    except ValueError:
+        return None
+
+
+def body_part_code(body_part):
+    """Row of a BodyPart (enum member or its value) in equipment arrays."""
+    return BODY_PART_CODES[BodyPart(body_part)]
+
+
+def body_part_codes(body_parts):
+    """Vectorized body_part_code, integer codes are passed through.
+
+    Values that are not a BodyPart map to -1.
+    """
+    body_parts = np.asarray(body_parts)
+    if np.issubdtype(body_parts.dtype, np.integer):
+        return body_parts.astype(np.intp, copy=False)
+    return np.vectorize(
+        lambda value: BODY_PART_CODES.get(_body_part(value), -1), otypes=[np.intp]
+    )(body_parts)
+
+
+class EquipmentIndex:
+    """Resistances of one character's equipment, one row per BodyPart.
+
+    res holds (phys_res, elem_res) per body part and equipped marks the rows
+    that are covered. The first item listed for a body part wins; items and
+    lookups whose part is not a BodyPart are skipped, as in ResistanceTable.
+    """
+
+    def __init__(self, equipment):
+        self.res = np.zeros((len(BODY_PARTS), 2), dtype=np.int16)
+        self.equipped = np.zeros(len(BODY_PARTS), dtype=bool)
+
+        for item in equipment:
+            part = _body_part(item["body_part"])
+            if part is None:
+                continue
+            code = BODY_PART_CODES[part]
+            if not self.equipped[code]:
+                self.res[code] = (int(item["phys_res"]), int(item["elem_res"]))
+                self.equipped[code] = True
+
+    def get(self, body_part):
+        part = _body_part(body_part)
+        if part is None:
+            return (None, None)
+        code = BODY_PART_CODES[part]
+        if not self.equipped[code]:
+            return (None, None)
+        phys_res, elem_res = self.res[code]
+        return (int(phys_res), int(elem_res))
+
+
+class ResistanceTable:
+    """Stacked EquipmentIndex rows for batched resistance resolution."""
+
+    def __init__(self, indexes):
+        indexes = [
+            index if isinstance(index, EquipmentIndex) else EquipmentIndex(index)
+            for index in indexes
+        ]
+        self.res = np.stack([index.res for index in indexes])
+        self.equipped = np.stack([index.equipped for index in indexes])
+
+    def resolve(self, characters, body_parts):
+        """Resistances for many (character, hit location) pairs in one call.
+
+        Returns phys_res, elem_res and equipped arrays shaped like the
+        broadcast of characters and body_parts; unequipped locations and
+        locations that are not a BodyPart resolve to 0 with equipped False.
+        """
+        characters = np.asarray(characters, dtype=np.intp)
+        codes = body_part_codes(body_parts)
+        known = codes >= 0
+        codes = np.where(known, codes, 0)
+        res = np.where(known[..., None], self.res[characters, codes], 0)
+        equipped = self.equipped[characters, codes] & known
+        return res[..., 0], res[..., 1], equipped
+
+
 def get_res(equipment, body_part):
-    """Return the physical and elemental resistances for a given body part."""
+    """Return the physical and elemental resistances for a given body part.
+
+    Items match on the raw body_part value, or on the BodyPart both values
+    name. An EquipmentIndex only covers BodyPart locations.
+    """
+    if isinstance(equipment, EquipmentIndex):
+        return equipment.get(body_part)
+
+    part = _body_part(body_part)
     for item in equipment:
-        if item["body_part"] == body_part:
+        if item["body_part"] == body_part or (
+            part is not None and _body_part(item["body_part"]) == part
+        ):
             return (item["phys_res"], item["elem_res"])
 
     return (None, None)  # Return (None, None) if the body part is not found
 
 
-def get_df(client, sheet, worksheet):
+def last_update_time(spreadsheet):
+    """Last-modified stamp of a spreadsheet, or None if the client has none."""
+    if hasattr(spreadsheet, "get_lastUpdateTime"):
+        return spreadsheet.get_lastUpdateTime()
+    return getattr(spreadsheet, "lastUpdateTime", None)
+
+
+def values_to_df(data):
+    """Transforms worksheet values (header row first) into a dataframe"""
+    if not data:
+        return pd.DataFrame()
+
+    # Batch reads drop trailing empty cells, get_all_values pads them
+    width = max(len(row) for row in data)
+    data = [row + [""] * (width - len(row)) for row in data]
+    return pd.DataFrame(data[1:], columns=data[0])
+
+
+def batch_get_values(spreadsheet, worksheets):
+    """Fetches the values of many worksheets in a single batch request"""
+    ranges = ["'{}'".format(worksheet.replace("'", "''")) for worksheet in worksheets]
+    response = spreadsheet.values_batch_get(ranges)
+    return {
+        worksheet: value_range.get("values", [])
+        for worksheet, value_range in zip(worksheets, response["valueRanges"])
+    }
+
+
+def sheet_key(sheet, worksheet):
+    """File-name safe key of a (sheet, worksheet) pair"""
+    return hashlib.sha1(f"{sheet}\0{worksheet}".encode()).hexdigest()[:16]
+
+
+class SheetCache:
+    """Local on-disk cache of worksheets keyed by (sheet, worksheet).
+
+    Entries younger than ttl seconds are served without touching the client.
+    Older entries are revalidated against the spreadsheet's last update time
+    and only downloaded again when the spreadsheet actually changed.
+    """
+
+    def __init__(self, path=".sheet_cache", ttl=300, fmt=CACHE_FORMAT):
+        self.path = path
+        self.ttl = ttl
+        self.fmt = fmt
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(path, exist_ok=True)
+
+    def _base(self, sheet, worksheet):
+        return os.path.join(self.path, sheet_key(sheet, worksheet))
+
+    def _load_meta(self, sheet, worksheet):
+        try:
+            with open(self._base(sheet, worksheet) + ".json") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_meta(self, sheet, worksheet, meta):
+        with open(self._base(sheet, worksheet) + ".json", "w") as f:
+            json.dump(meta, f)
+
+    def _read(self, sheet, worksheet, meta):
+        base = self._base(sheet, worksheet)
+        if meta["format"] == "feather":
+            df = pd.read_feather(base + ".feather")
+        else:
+            df = pd.read_pickle(base + ".pkl")
+        # Columns are stored positionally so duplicate or blank headers survive
+        df.columns = meta["columns"]
+        return df
+
+    def _write(self, sheet, worksheet, df, revision):
+        base = self._base(sheet, worksheet)
+        stored = df.copy()
+        stored.columns = [str(i) for i in range(df.shape[1])]
+        if self.fmt == "feather":
+            stored.to_feather(base + ".feather")
+        else:
+            stored.to_pickle(base + ".pkl")
+        self._save_meta(
+            sheet,
+            worksheet,
+            {
+                "columns": df.columns.tolist(),
+                "format": self.fmt,
+                "revision": revision,
+                "fetched_at": time.time(),
+            },
+        )
+
+    def get_dfs(self, client, sheet, worksheets):
+        """Cached equivalent of helpers.get_dfs"""
+        dfs = {}
+        stale = {}
+        for worksheet in worksheets:
+            meta = self._load_meta(sheet, worksheet)
+            if meta and time.time() - meta["fetched_at"] < self.ttl:
+                self.hits += 1
+                dfs[worksheet] = self._read(sheet, worksheet, meta)
+            else:
+                stale[worksheet] = meta
+
+        if stale:
+            spreadsheet = client.open(sheet)
+            revision = last_update_time(spreadsheet)
+            missing = []
+            for worksheet, meta in stale.items():
+                if meta and revision is not None and meta["revision"] == revision:
+                    meta["fetched_at"] = time.time()
+                    self._save_meta(sheet, worksheet, meta)
+                    self.hits += 1
+                    dfs[worksheet] = self._read(sheet, worksheet, meta)
+                else:
+                    missing.append(worksheet)
+
+            if missing:
+                self.misses += len(missing)
+                values = batch_get_values(spreadsheet, missing)
+                for worksheet, data in values.items():
+                    dfs[worksheet] = values_to_df(data)
+                    self._write(sheet, worksheet, dfs[worksheet], revision)
+
+        return {worksheet: dfs[worksheet] for worksheet in worksheets}
+
+    def get_df(self, client, sheet, worksheet):
+        """Cached equivalent of helpers.get_df"""
+        return self.get_dfs(client, sheet, [worksheet])[worksheet]
+
+    def invalidate(self, sheet, worksheet):
+        """Drops a cached worksheet so the next read downloads it again."""
+        base = self._base(sheet, worksheet)
+        for ext in (".json", ".feather", ".pkl"):
+            if os.path.exists(base + ext):
+                os.remove(base + ext)
+
+
+def get_df(client, sheet, worksheet, cache=None):
     """Gets a worksheet from google sheet and transforms it into a dataframe"""
+    if cache is not None:
+        return cache.get_df(client, sheet, worksheet)
+
     sheet = client.open(sheet)
     worksheet = sheet.worksheet(worksheet)
     data = worksheet.get_all_values()
-    df = pd.DataFrame(data[1:], columns=data[0])
-    return df
+    return values_to_df(data)
+
 
+def get_dfs(client, sheet, worksheets, cache=None):
+    """Gets many worksheets of one google sheet as a dict of dataframes
 
-def get_dict(client, sheet, worksheet):
+    The spreadsheet is opened once and all worksheets are pulled in a single
+    batch values request.
+    """
+    if cache is not None:
+        return cache.get_dfs(client, sheet, worksheets)
+
+    spreadsheet = client.open(sheet)
+    values = batch_get_values(spreadsheet, worksheets)
+    return {worksheet: values_to_df(data) for worksheet, data in values.items()}
+
+
+def get_dict(client, sheet, worksheet, cache=None):
     """Gets a worksheet from google sheet (Name+Value cols) and transforms it into a dataframe"""
-    df = get_df(client, sheet, worksheet)
+    df = get_dfs(client, sheet, [worksheet], cache)[worksheet]
     df["Value"] = pd.to_numeric(df["Value"], errors="coerce")
     sorted_df = df.sort_values(by="Name")
     return sorted_df
 
-def set_sheet(client, sheet, worksheet, df):
-    """Sets a dataframe into a worksheet from google sheet"""
+
+def get_table(client, sheet, worksheet, cache=None):
+    """Gets a worksheet (Name+Value cols) as a LookupTable for get_val"""
+    return LookupTable(get_dict(client, sheet, worksheet, cache))
+
+
+def load_worksheets(
+    client, pairs, max_workers=4, timeout=None, cache=None, return_exceptions=False
+):
+    """Fetches many (sheet, worksheet) pairs in parallel on a bounded pool
+
+    At most max_workers requests are in flight, which keeps bursts within the
+    API quota. timeout applies to each request from the moment it starts; a
+    request that runs longer resolves to TimeoutError, though its thread is
+    left to finish in the background. Returns {(sheet, worksheet): df}, with
+    failures raised or, with return_exceptions, stored in place of the df.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    started = {}
+
+    def fetch(pair):
+        started[pair] = time.monotonic()
+        return get_df(client, *pair, cache=cache)
+
+    results = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {executor.submit(fetch, pair): pair for pair in pairs}
+        pending = set(futures)
+        while pending:
+            deadlines = [
+                started[futures[future]] + timeout
+                for future in pending
+                if timeout is not None and futures[future] in started
+            ]
+            wait_for = None
+            if timeout is not None:
+                wait_for = (
+                    max(min(deadlines) - time.monotonic(), 0) if deadlines else 0.05
+                )
+
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is not None and not return_exceptions:
+                    raise error
+                results[futures[future]] = (
+                    error if error is not None else future.result()
+                )
+
+            now = time.monotonic()
+            for future in list(pending):
+                pair = futures[future]
+                if (
+                    timeout is not None
+                    and pair in started
+                    and now - started[pair] > timeout
+                ):
+                    pending.discard(future)
+                    error = TimeoutError(f"Fetching {pair} took over {timeout}s")
+                    if not return_exceptions:
+                        raise error
+                    results[pair] = error
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return {pair: results[pair] for pair in pairs}
+
+
+async def load_worksheets_async(
+    client, pairs, max_concurrency=4, timeout=None, cache=None, return_exceptions=False
+):
+    """asyncio flavour of load_worksheets, awaitable from a notebook cell
+
+    Fetches run on a dedicated pool of max_concurrency threads, so requests
+    that timed out but are still running keep counting against the limit.
+    timeout applies to each request from the moment it starts.
+    """
+    pairs = list(dict.fromkeys(pairs))
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    async def fetch(pair):
+        started = asyncio.Event()
+
+        def run():
+            loop.call_soon_threadsafe(started.set)
+            return get_df(client, *pair, cache=cache)
+
+        future = loop.run_in_executor(executor, run)
+        await started.wait()
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Fetching {pair} took over {timeout}s") from None
+
+    try:
+        results = await asyncio.gather(
+            *(fetch(pair) for pair in pairs), return_exceptions=return_exceptions
+        )
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return dict(zip(pairs, results))
+
+
+def df_to_values(df):
+    """Header row followed by the rows of a dataframe, as plain python values"""
+    return [df.columns.tolist()] + df.values.tolist()
+
+
+def a1(row, col):
+    """A1 notation of a 0-based (row, col) cell"""
+    letters = ""
+    col += 1
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return f"{letters}{row + 1}"
+
+
+def diff_ranges(old, new):
+    """Rectangles of changed cells between two equally shaped value grids.
+
+    Changed cells are grouped into runs of columns per row, and runs spanning
+    the same columns on consecutive rows are merged into one rectangle.
+    Returns (top, left, bottom, right) tuples, inclusive and 0-based. Cells
+    that are missing (NaN or None) on both sides count as unchanged.
+    """
+    old = np.asarray(old, dtype=object)
+    new = np.asarray(new, dtype=object)
+    changed = (old != new) & ~(pd.isna(old) & pd.isna(new))
+    open_runs = {}
+    ranges = []
+    for row, mask in enumerate(changed):
+        runs = set()
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.view(np.int8), [0]))))
+        for left, right in zip(edges[::2], edges[1::2] - 1):
+            runs.add((left, right))
+
+        for run in list(open_runs):
+            if run not in runs:
+                ranges.append((open_runs.pop(run), run[0], row - 1, run[1]))
+        for run in runs:
+            open_runs.setdefault(run, row)
+
+    for (left, right), top in open_runs.items():
+        ranges.append((top, left, len(changed) - 1, right))
+    return sorted(ranges)
+
+
+class SheetSnapshots:
+    """Last-synced values of worksheets, used by set_sheet to write diffs"""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, sheet, worksheet):
+        return self.values.get((sheet, worksheet))
+
+    def record(self, sheet, worksheet, df, values=None):
+        """Marks df as the current content of the worksheet
+
+        values, when given, must be df_to_values(df) and saves converting again.
+        """
+        self.values[(sheet, worksheet)] = df_to_values(df) if values is None else values
+
+
+def set_sheet(client, sheet, worksheet, df, cache=None, snapshots=None):
+    """Sets a dataframe into a worksheet from google sheet
+
+    With snapshots, only the cells that changed since the last sync are sent,
+    in one batch update; the first sync and shape changes write everything.
+    Returns the number of cells and ranges written.
+    """
+    if cache is not None:
+        cache.invalidate(sheet, worksheet)
     spreadsheet = client.open(sheet)
-    worksheet = spreadsheet.worksheet(worksheet)
-    worksheet.update('A1', [df.columns.tolist()] + df.values.tolist())
+    ws = spreadsheet.worksheet(worksheet)
+    values = df_to_values(df)
+
+    old = snapshots.get(sheet, worksheet) if snapshots is not None else None
+    if old is None or np.shape(old) != np.shape(values):
+        ws.update(range_name="A1", values=values)
+        report = {"mode": "full", "cells": df.shape[1] * (df.shape[0] + 1), "ranges": 1}
+    else:
+        ranges = diff_ranges(old, values)
+        if ranges:
+            ws.batch_update(
+                [
+                    {
+                        "range": f"{a1(top, left)}:{a1(bottom, right)}",
+                        "values": [
+                            row[left : right + 1] for row in values[top : bottom + 1]
+                        ],
+                    }
+                    for top, left, bottom, right in ranges
+                ]
+            )
+        report = {
+            "mode": "diff",
+            "cells": sum((b - t + 1) * (r - l + 1) for t, l, b, r in ranges),
+            "ranges": len(ranges),
+        }
 
-def create_sheet(client, sheet, worksheet, df):
-    """Sets a dataframe into a worksheet from google sheet"""
+    if snapshots is not None:
+        snapshots.record(sheet, worksheet, df, values)
+    return report
+
+
+class UploadProgress:
+    """On-disk record of the rows create_sheet has committed per worksheet
+
+    header tells whether the header row has been written yet.
+    """
+
+    def __init__(self, path=".upload_progress"):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, sheet, worksheet):
+        return os.path.join(self.path, sheet_key(sheet, worksheet) + ".json")
+
+    def get(self, sheet, worksheet):
+        try:
+            with open(self._file(sheet, worksheet)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, sheet, worksheet, shape, rows, header=True):
+        with open(self._file(sheet, worksheet), "w") as f:
+            json.dump({"shape": list(shape), "rows": rows, "header": header}, f)
+
+    def clear(self, sheet, worksheet):
+        if os.path.exists(self._file(sheet, worksheet)):
+            os.remove(self._file(sheet, worksheet))
+
+
+def create_sheet(client, sheet, worksheet, df, chunk_rows=1000, progress=None):
+    """Sets a dataframe into a new worksheet from google sheet
+
+    Rows are converted and sent chunk_rows at a time. With progress, the new
+    worksheet, its header and every committed chunk are recorded so an
+    interrupted upload resumes after the last step instead of starting over.
+    """
     spreadsheet = client.open(sheet)
-    worksheet = spreadsheet.add_worksheet(title=worksheet, rows=str(df.shape[0]), cols=str(df.shape[1]))
-    worksheet.update([df.columns.tolist()] + df.values.tolist())
\ No newline at end of file
+    record = progress.get(sheet, worksheet) if progress is not None else None
+
+    if record is None:
+        ws = spreadsheet.add_worksheet(
+            title=worksheet, rows=str(df.shape[0] + 1), cols=str(df.shape[1])
+        )
+        record = {"shape": list(df.shape), "rows": 0, "header": False}
+        if progress is not None:
+            progress.set(sheet, worksheet, df.shape, 0, header=False)
+    else:
+        if tuple(record["shape"]) != df.shape:
+            raise ValueError(
+                f"Cannot resume upload of {worksheet}: "
+                f"started with shape {tuple(record['shape'])}, got {df.shape}"
+            )
+        ws = spreadsheet.worksheet(worksheet)
+
+    if not record.get("header", True):
+        ws.update(range_name="A1", values=[df.columns.tolist()])
+        if progress is not None:
+            progress.set(sheet, worksheet, df.shape, 0)
+
+    done = record["rows"]
+    for start in range(done, df.shape[0], chunk_rows):
+        rows = df.iloc[start : start + chunk_rows].values.tolist()
+        ws.update(range_name=f"A{start + 2}", values=rows)
+        if progress is not None:
+            progress.set(sheet, worksheet, df.shape, start + len(rows))
+
+    if progress is not None:
+        progress.clear(sheet, worksheet)
+    return ws
@@ -0,0 +1,159 @@
+import os
+import pickle
+import struct
+
+from engine import CombatantState, TurnEngine
+from rules import ACTIONS, ACTION_CODES, AP_OPTIONS, ap_points
+
+RESET = 0
+DO = 1
+UNDO = 2
+END = 3
+
+# op, action code, then up to three unsigned values (sta, ms, init_sta for
+# RESET; AP points for DO; action id for UNDO)
+RECORD = struct.Struct("<BBHHH")
+
+
+class Journal:
+    """Append-only binary log of tracker operations with periodic snapshots.
+
+    Every reset, action, undo and round end is one fixed-size record in
+    path; every snapshot_every rounds the engine state, the round summaries
+    and the journal offset are pickled to path + ".snap", so resuming only
+    replays the records written after it.
+    """
+
+    def __init__(self, path="tracker.journal", snapshot_every=5):
+        self.path = path
+        self.snapshot_path = path + ".snap"
+        self.snapshot_every = snapshot_every
+        self.file = open(path, "ab")
+        # Drop a record torn by a crash so new records stay aligned
+        torn = self.file.tell() % RECORD.size
+        if torn:
+            self.file.truncate(self.file.tell() - torn)
+            self.file.seek(0, os.SEEK_END)
+
+    def close(self):
+        self.file.close()
+
+    def append(self, op, action=0, a=0, b=0, c=0):
+        self.file.write(RECORD.pack(op, action, a, b, c))
+        self.file.flush()
+
+    def offset(self):
+        return self.file.tell()
+
+    def records(self, offset=0):
+        """(op, action, a, b, c) tuples from offset, ignoring a torn last record."""
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        end = len(data) - len(data) % RECORD.size
+        return RECORD.iter_unpack(data[:end])
+
+    def snapshot(self, engine, summaries):
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump((self.offset(), engine.state, summaries), f)
+        os.replace(tmp, self.snapshot_path)
+
+    def load_snapshot(self):
+        """(offset, state, summaries) of the latest snapshot, None without one."""
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                return pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def resume(self):
+        """JournaledEngine at the end of the journal, with its round summaries."""
+        engine = TurnEngine()
+        summaries = []
+        offset = 0
+        snapshot = self.load_snapshot()
+        if snapshot is not None:
+            offset, engine.state, summaries = snapshot
+
+        journaled = JournaledEngine(journal=self)
+        journaled.summaries = replay(self.records(offset), engine, summaries)
+        journaled.state = engine.state
+        return journaled
+
+
+def replay(records, engine=None, summaries=None):
+    """Applies journal records to engine and returns the round summaries.
+
+    Without an engine the records are replayed headlessly from a fresh one,
+    which is how a whole game is audited.
+    """
+    engine = TurnEngine() if engine is None else engine
+    summaries = [] if summaries is None else summaries
+    for op, action, a, b, c in records:
+        if op == RESET:
+            engine.state = CombatantState(a, b, c)
+            summaries = []
+        elif op == DO:
+            engine.do_action(ACTIONS[action], AP_OPTIONS[a - 1])
+        elif op == UNDO:
+            engine.undo_action(a)
+        elif op == END:
+            summaries.append(engine.end_round())
+        else:
+            raise ValueError(f"Unknown journal record {op}")
+    return summaries
+
+
+def replay_file(path):
+    """Round summaries of every game in the journal at path, replayed headlessly."""
+    with open(path, "rb") as f:
+        data = f.read()
+    end = len(data) - len(data) % RECORD.size
+    return replay(RECORD.iter_unpack(data[:end]))
+
+
+class JournaledEngine(TurnEngine):
+    """TurnEngine that appends every state change to a Journal.
+
+    Snapshots are written after every journal.snapshot_every rounds.
+    """
+
+    __slots__ = ("journal", "summaries")
+
+    def __init__(self, sta=10, ms=10, init_sta=None, journal=None):
+        super().__init__(sta, ms, init_sta)
+        self.journal = journal
+        self.summaries = []
+
+    def _append(self, *record):
+        if self.journal is not None:
+            self.journal.append(*record)
+
+    def reset(self, sta=None, ms=None):
+        super().reset(sta, ms)
+        self.summaries = []
+        state = self.state
+        self._append(RESET, 0, state.sta, state.ms, state.init_sta)
+
+    def do_action(self, action, ap):
+        record = super().do_action(action, ap)
+        if record is not None:
+            self._append(DO, ACTION_CODES[action], ap_points(ap))
+        return record
+
+    def undo_action(self, action_id=None):
+        if action_id is None:
+            action_id = self.state.actions.last_id()
+        removed_action = super().undo_action(action_id)
+        self._append(UNDO, 0, action_id)
+        return removed_action
+
+    def end_round(self):
+        summary = super().end_round()
+        self.summaries.append(summary)
+        self._append(END)
+        journal = self.journal
+        if journal is not None and len(self.summaries) % journal.snapshot_every == 0:
+            journal.snapshot(self, self.summaries)
+        return summary
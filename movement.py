@@ -1,63 +1,54 @@
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
-from IPython.display import display, clear_output
+from IPython.display import HTML, Image, display, clear_output
 import ipywidgets as widgets
+from grids import (
+    DGREEN,
+    LGREEN,
+    ORANGE,
+    RED,
+    bands_to_html,
+    bands_to_png,
+    classify,
+    distance_window,
+    master_field,
+    style_bands,
+)
+from pathing import movement_cost
+from rules import MAX_AP, MOVES, STA_COST, action_code, movement
 
+WALL = "#404040"
 
-def movement_matrix(ms, action):
-    lgreen = "#A4D682"
-    dgreen = "#6B7823"
-    orange = "#FF8C00"
-    red = "#FF5050"
 
-    size = (ms if action == "walk" else (2 * ms if action == "run" else 4 * ms)) + 3
-    print(size)
+def movement_size(ms, action):
+    return (ms if action == "walk" else (2 * ms if action == "run" else 4 * ms)) + 3
+
+
+def movement_thresholds(ms, action):
+    """Distance reachable with 1 to 4 AP of the action."""
+    ap = np.arange(1, MAX_AP + 1)
+    return movement(ms, action_code(MOVES.get(action)), ap).tolist()
 
-    def modified_distance(x1, y1, x2, y2):
-        dx, dy = abs(x1 - x2), abs(y1 - y2)
-        diagonal = min(dx, dy)
-        straight = (dx + dy) - 2 * diagonal
-        return (diagonal * 4) + (straight * 3)
 
-    # Adjust the function to calculate the distance from (0, 0) instead of from the center
-    def modified_distance_from_origin(x, y):
-        return modified_distance(x, y, 0, 0)
+def movement_bands(ms, action):
+    """Distance frame of movement_matrix with its band matrix and band colours."""
+    size = movement_size(ms, action)
+    print(size)
 
     center = size // 2  # Central point of the matrix
 
     # Create DataFrame with modified distances from the origin
     df = pd.DataFrame(
-        index=range(-center, center + 1), columns=range(-center, center + 1)
+        distance_window(size),
+        index=range(-center, center + 1),
+        columns=range(-center, center + 1),
     )
 
-    # Populate the DataFrame
-    for i in df.index:
-        for j in df.columns:
-            df.at[i, j] = modified_distance_from_origin(i, j)
-
-    ap_1_sta = 0
-    ap_2_sta = 0
-    ap_3_sta = 0
-    ap_4_sta = 0
-
-    for ap in range(1, 5):
-        if action == "run":
-            if ap == 1:
-                ap_1_sta = 1
-            elif ap == 2:
-                ap_2_sta = 2
-            elif ap == 3:
-                ap_3_sta = 3
-            elif ap == 4:
-                ap_4_sta = 3
-        elif action == "sprint":
-            if ap == 1:
-                ap_1_sta = 3
-            elif ap == 2:
-                ap_2_sta = 4
-            elif ap == 3:
-                ap_3_sta = 7
-            elif ap == 4:
-                ap_4_sta = 7
+    ap_1_sta, ap_2_sta, ap_3_sta, ap_4_sta = STA_COST[
+        action_code(MOVES.get(action)), 1:
+    ].tolist()
 
     q_len = len(df) // 4
     q_rem = len(df) % 4
@@ -86,51 +77,48 @@ def movement_matrix(ms, action):
     # Transposing the DataFrame to switch rows and columns
     df = df.T
 
-    def highlight_cells(value):
-        ap_1_ms = 0
-        ap_2_ms = 0
-        ap_3_ms = 0
-        ap_4_ms = 0
-
-        for ap in range(1, 5):
-            if action == "walk":
-                if ap == 1:
-                    ap_1_ms = ms // 4
-                elif ap == 2:
-                    ap_2_ms = ms // 2
-                elif ap == 3:
-                    ap_3_ms = ms // 4 + ms // 2
-                elif ap == 4:
-                    ap_4_ms = ms
-            if action == "run":
-                if ap == 1:
-                    ap_1_ms = ms // 2
-                elif ap == 2:
-                    ap_2_ms = ms
-                elif ap == 3:
-                    ap_3_ms = ms + ms // 2
-                elif ap == 4:
-                    ap_4_ms = 2 * ms
-            elif action == "sprint":
-                if ap == 1:
-                    ap_1_ms = ms
-                elif ap == 2:
-                    ap_2_ms = 2 * ms
-                elif ap == 3:
-                    ap_3_ms = 3 * ms
-                elif ap == 4:
-                    ap_4_ms = 4 * ms
-
-        if value <= ap_1_ms:
-            return f"background-color: {lgreen}"
-        elif value <= ap_2_ms:
-            return f"background-color: {dgreen}"
-        elif value <= ap_3_ms:
-            return f"background-color: {orange}"
-        elif value <= ap_4_ms:
-            return f"background-color: {red}"
-
-    return df.style.applymap(highlight_cells)
+    bands = classify(df.to_numpy(), movement_thresholds(ms, action))
+    return df, bands, [LGREEN, DGREEN, ORANGE, RED]
+
+
+@lru_cache(maxsize=64)
+def movement_matrix_html(ms, action):
+    return bands_to_html(*movement_bands(ms, action))
+
+
+def movement_matrix(ms, action, output="styler", zoom=4, crop=None):
+    """Walk, run or sprint reach around the origin, banded by AP.
+
+    output="styler" returns a pandas Styler, output="html" a cached HTML
+    table rendered without one and output="png" a raster image with zoom
+    pixels per cell, optionally cropped to (top, left, bottom, right) cells.
+    """
+    if output == "png":
+        df, bands, colors = movement_bands(ms, action)
+        return Image(data=bands_to_png(bands, colors, zoom, crop), format="png")
+    if output == "html":
+        return HTML(movement_matrix_html(ms, action))
+    return style_bands(*movement_bands(ms, action))
+
+
+def terrain_movement_bands(terrain, origin, ms, action):
+    """Exact movement cost on a terrain grid with the AP bands of movement_matrix.
+
+    Walls get their own band after the four AP bands so they can be drawn;
+    cells out of reach come last.
+    """
+    thresholds = movement_thresholds(ms, action)
+    cost = movement_cost(terrain, origin, limit=max(thresholds))
+    bands = classify(cost, thresholds)
+    bands[bands == len(thresholds)] = len(thresholds) + 1
+    bands[np.asarray(terrain) <= 0] = len(thresholds)
+    return cost, bands, [LGREEN, DGREEN, ORANGE, RED, WALL]
+
+
+def terrain_movement_matrix(terrain, origin, ms, action, zoom=2, crop=None):
+    """PNG of walk, run or sprint reach from origin on a terrain grid."""
+    cost, bands, colors = terrain_movement_bands(terrain, origin, ms, action)
+    return Image(data=bands_to_png(bands, colors, zoom, crop), format="png")
 
 
 # ++++++++
@@ -169,6 +157,9 @@ def display_movement_matrix(init_ms=15):
     # Attach the slider's value change event to the function
     ms_slider.observe(display_movement_matrix, names="value")
 
+    # Size the shared distance field once for the largest slider value
+    master_field(movement_size(ms_slider.max, "sprint") // 2)
+
     # Create a VBox layout for the slider and tabs
     slider_and_tabs = widgets.VBox([ms_slider, tabs])
 
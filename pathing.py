@@ -0,0 +1,74 @@
+import numpy as np
+
+UNREACHABLE = np.iinfo(np.int32).max
+
+# (row step, column step, base cost) of the 3-straight/4-diagonal metric
+STEPS = [
+    (-1, 0, 3),
+    (1, 0, 3),
+    (0, -1, 3),
+    (0, 1, 3),
+    (-1, -1, 4),
+    (-1, 1, 4),
+    (1, -1, 4),
+    (1, 1, 4),
+]
+
+
+def movement_cost(terrain, origin, limit=None):
+    """Exact movement cost from origin to every cell of a terrain grid.
+
+    terrain holds an integer cost factor per cell (1 open ground, 2 difficult
+    terrain, ...) and 0 for walls. Entering a cell costs 3 straight or 4
+    diagonally, times its factor, and diagonals cannot cut wall corners.
+    Because edge weights are small integers this is Dial's bucket-queue
+    shortest path; each bucket of equal cost is relaxed as one vectorized
+    batch. Cells costing more than limit, and walls, are UNREACHABLE.
+    """
+    terrain = np.asarray(terrain)
+    if not np.issubdtype(terrain.dtype, np.integer):
+        raise ValueError("terrain must hold integer cost factors")
+    height, width = terrain.shape
+    limit = UNREACHABLE - 1 if limit is None else limit
+
+    passable = terrain > 0
+    factor = terrain.astype(np.int32).ravel()
+    cost = np.full(height * width, UNREACHABLE, dtype=np.int32)
+
+    row, col = origin
+    if not passable[row, col]:
+        return cost.reshape(height, width)
+    start = row * width + col
+    cost[start] = 0
+
+    buckets = {0: [np.array([start])]}
+    while buckets:
+        d = min(buckets)
+        cells = np.unique(np.concatenate(buckets.pop(d)))
+        cells = cells[cost[cells] == d]  # drop entries improved since queued
+        if not len(cells):
+            continue
+
+        rows, cols = np.divmod(cells, width)
+        for dr, dc, base in STEPS:
+            r, c = rows + dr, cols + dc
+            ok = (r >= 0) & (r < height) & (c >= 0) & (c < width)
+            r, c, r0, c0 = r[ok], c[ok], rows[ok], cols[ok]
+            ok = passable[r, c]
+            if dr and dc:
+                ok &= passable[r0 + dr, c0] & passable[r0, c0 + dc]
+
+            neighbours = r[ok] * width + c[ok]
+            new_cost = d + base * factor[neighbours]
+            better = (new_cost < cost[neighbours]) & (new_cost <= limit)
+            neighbours, new_cost = neighbours[better], new_cost[better]
+            if not len(neighbours):
+                continue
+
+            cost[neighbours] = new_cost
+            order = np.argsort(new_cost, kind="stable")
+            values, starts = np.unique(new_cost[order], return_index=True)
+            for value, group in zip(values, np.split(neighbours[order], starts[1:])):
+                buckets.setdefault(int(value), []).append(group)
+
+    return cost.reshape(height, width)
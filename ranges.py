@@ -1,62 +1,134 @@
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
-from IPython.display import display, clear_output
+from IPython.display import HTML, Image, display, clear_output
 import ipywidgets as widgets
-
-
-def range_matrix(size, half, full):
-    lgreen = "#A4D682"
-    dgreen = "#6B7823"
-    blue = "#4078A4"
-    orange = "#FF8C00"
-    red = "#FF5050"
-
-    melee = 3
-    reaching = 6
-    short = 10
-    mid = 30
-    long = 50
-
-    def modified_distance(x1, y1, x2, y2):
-        dx, dy = abs(x1 - x2), abs(y1 - y2)
-        diagonal = min(dx, dy)
-        straight = (dx + dy) - 2 * diagonal
-        return (diagonal * 4) + (straight * 3)
-
-    # Adjust the function to calculate the distance from (0, 0) instead of from the center
-    def modified_distance_from_origin(x, y):
-        return modified_distance(x, y, 0, 0)
-
+from grids import (
+    BLUE,
+    DGREEN,
+    LGREEN,
+    ORANGE,
+    RANGE_BANDS,
+    RED,
+    bands_to_html,
+    bands_to_png,
+    classify,
+    distance_window,
+    modified_distance,
+    style_bands,
+)
+
+
+def range_bands(size, half, full, visible=None):
+    """Distance frame of range_matrix with its band matrix and band colours.
+
+    Cells where the optional visible mask is False are left unstyled.
+    """
     center = size // 2  # Central point of the matrix
 
     # Create DataFrame with modified distances from the origin
     df = pd.DataFrame(
-        index=range(-center, center + 1), columns=range(-center, center + 1)
+        distance_window(size),
+        index=range(-center, center + 1),
+        columns=range(-center, center + 1),
     )
 
-    # Populate the DataFrame
-    for i in df.index:
-        for j in df.columns:
-            df.at[i, j] = modified_distance_from_origin(i, j)
-
-    def highlight_cells(value):
-        if half is None and full is None:
-            if value <= melee:
-                return f"background-color: {lgreen}"
-            elif value <= reaching:
-                return f"background-color: {dgreen}"
-            elif value <= short:
-                return f"background-color: {blue}"
-            elif value <= mid:
-                return f"background-color: {orange}"
-            elif value <= long:
-                return f"background-color: {red}"
-        else:  # explosions
-            if value <= half:
-                return f"background-color: {red}"
-            elif value <= full:
-                return f"background-color: {orange}"
-
-    return df.style.applymap(highlight_cells)
+    if half is None and full is None:
+        thresholds = RANGE_BANDS
+        colors = [LGREEN, DGREEN, BLUE, ORANGE, RED]
+    else:  # explosions
+        thresholds = [half, full]
+        colors = [RED, ORANGE]
+
+    bands = classify(df.to_numpy(), thresholds)
+    if visible is not None:
+        bands[~np.asarray(visible, dtype=bool)] = len(thresholds)
+    return df, bands, colors
+
+
+BAND_NAMES = ["Melee", "Reaching", "Short", "Mid", "Long", "Out of range"]
+
+
+def _coords(points):
+    return np.asarray(points).reshape(-1, 2)
+
+
+def _pair_bands(attackers, targets):
+    offset = attackers - targets
+    distances = modified_distance(offset[..., 0], offset[..., 1])
+    return classify(distances, RANGE_BANDS), distances
+
+
+def iter_cross_bands(attackers, targets, max_pairs=1 << 22):
+    """Bands and distances of every attacker/target pair in row blocks.
+
+    Yields (rows, bands, distances) where rows slices the attackers and the
+    arrays are shaped (block, len(targets)) with at most max_pairs cells.
+    """
+    attackers, targets = _coords(attackers), _coords(targets)
+    step = max(1, max_pairs // max(len(targets), 1))
+    for start in range(0, len(attackers), step):
+        rows = slice(start, min(start + step, len(attackers)))
+        bands, distances = _pair_bands(attackers[rows, None, :], targets[None, :, :])
+        yield rows, bands, distances
+
+
+def classify_pairs(attackers, targets, cross=False, max_pairs=1 << 22):
+    """Range band and exact distance of attacker/target pairs.
+
+    attackers and targets are (n, 2) cell coordinates. By default attackers[i]
+    is paired with targets[i] (a single coordinate broadcasts); cross=True
+    returns (len(attackers), len(targets)) arrays for all pairs. Work is done
+    in blocks of at most max_pairs pairs. Band codes index BAND_NAMES.
+    """
+    attackers, targets = _coords(attackers), _coords(targets)
+    dtype = np.result_type(attackers, targets)
+
+    if cross:
+        shape = (len(attackers), len(targets))
+        bands = np.empty(shape, dtype=np.int8)
+        distances = np.empty(shape, dtype=dtype)
+        for rows, block_bands, block_distances in iter_cross_bands(
+            attackers, targets, max_pairs
+        ):
+            bands[rows] = block_bands
+            distances[rows] = block_distances
+        return bands, distances
+
+    n = np.broadcast_shapes((len(attackers),), (len(targets),))[0]
+    attackers = np.broadcast_to(attackers, (n, 2))
+    targets = np.broadcast_to(targets, (n, 2))
+    bands = np.empty(n, dtype=np.int8)
+    distances = np.empty(n, dtype=dtype)
+    for start in range(0, n, max_pairs):
+        rows = slice(start, start + max_pairs)
+        bands[rows], distances[rows] = _pair_bands(attackers[rows], targets[rows])
+    return bands, distances
+
+
+@lru_cache(maxsize=32)
+def range_matrix_html(size, half, full):
+    return bands_to_html(*range_bands(size, half, full))
+
+
+def range_matrix(size, half, full, output="styler", zoom=4, crop=None, visible=None):
+    """Range or explosion bands around the origin.
+
+    output="styler" returns a pandas Styler, output="html" a cached HTML
+    table rendered without one and output="png" a raster image with zoom
+    pixels per cell, optionally cropped to (top, left, bottom, right) cells.
+    visible masks out cells without line of sight, for example
+    sight.SightMap.visible_window(origin, size).
+    """
+    if output == "png":
+        df, bands, colors = range_bands(size, half, full, visible)
+        return Image(data=bands_to_png(bands, colors, zoom, crop), format="png")
+    if output == "html":
+        if visible is not None:
+            return HTML(bands_to_html(*range_bands(size, half, full, visible)))
+        return HTML(range_matrix_html(size, half, full))
+    return style_bands(*range_bands(size, half, full, visible))
 
 
 # ++++++++
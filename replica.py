@@ -0,0 +1,307 @@
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from helpers import last_update_time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sheets (
+    name TEXT PRIMARY KEY,
+    modified TEXT
+);
+CREATE TABLE IF NOT EXISTS worksheets (
+    id INTEGER PRIMARY KEY,
+    sheet TEXT NOT NULL,
+    title TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    cols INTEGER NOT NULL,
+    dirty INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (sheet, title)
+);
+CREATE TABLE IF NOT EXISTS cells (
+    worksheet_id INTEGER NOT NULL,
+    row INTEGER NOT NULL,
+    col INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (worksheet_id, row, col)
+) WITHOUT ROWID;
+"""
+
+CELL_RE = re.compile(r"(?:.*!)?\$?([A-Za-z]+)\$?(\d+)")
+
+
+class WorksheetNotFound(KeyError):
+    pass
+
+
+class SpreadsheetNotFound(KeyError):
+    pass
+
+
+def now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def parse_cell(range_name):
+    """0-based (row, col) of the top-left cell of an A1 range"""
+    match = CELL_RE.match(range_name.split(":")[0])
+    if match is None:
+        raise ValueError(f"Unsupported range: {range_name}")
+    letters, row = match.groups()
+    col = 0
+    for letter in letters.upper():
+        col = col * 26 + ord(letter) - ord("A") + 1
+    return int(row) - 1, col - 1
+
+
+def cell_value(value):
+    """Cell values are kept as the strings the spreadsheet returns"""
+    if value is None or value != value:  # None and NaN are empty cells
+        return ""
+    if isinstance(value, bool):
+        return str(value).upper()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+class ReplicaWorksheet:
+    def __init__(self, spreadsheet, id, title):
+        self.spreadsheet = spreadsheet
+        self.id = id
+        self.title = title
+
+    @property
+    def replica(self):
+        return self.spreadsheet.replica
+
+    def get_all_values(self):
+        return self.replica._values(self.id)
+
+    def update(self, range_name=None, values=None, **kwargs):
+        """Writes values from range_name (A1 by default), like gspread"""
+        # gspread 6 takes (values, range_name), older versions the reverse
+        if not isinstance(range_name, str) and range_name is not None:
+            range_name, values = values, range_name
+        row, col = parse_cell(range_name or "A1")
+        self.replica._write(self.id, [(row, col, values)])
+
+    def batch_update(self, data, **kwargs):
+        self.replica._write(
+            self.id,
+            [parse_cell(item["range"]) + (item["values"],) for item in data],
+        )
+
+    def clear(self):
+        self.replica._clear(self.id)
+
+
+class ReplicaSpreadsheet:
+    def __init__(self, replica, name):
+        self.replica = replica
+        self.title = name
+
+    def worksheet(self, title):
+        row = self.replica._query(
+            "SELECT id FROM worksheets WHERE sheet = ? AND title = ?",
+            (self.title, title),
+        )
+        if not row:
+            raise WorksheetNotFound(title)
+        return ReplicaWorksheet(self, row[0][0], title)
+
+    def worksheets(self):
+        rows = self.replica._query(
+            "SELECT id, title FROM worksheets WHERE sheet = ? ORDER BY id",
+            (self.title,),
+        )
+        return [ReplicaWorksheet(self, id, title) for id, title in rows]
+
+    def add_worksheet(self, title, rows=1000, cols=26, index=None):
+        id = self.replica._add_worksheet(self.title, title, int(rows), int(cols))
+        return ReplicaWorksheet(self, id, title)
+
+    def values_batch_get(self, ranges, params=None):
+        value_ranges = []
+        for range_name in ranges:
+            title = range_name.split("!")[0]
+            if title.startswith("'") and title.endswith("'"):
+                title = title[1:-1].replace("''", "'")
+            values = self.worksheet(title).get_all_values()
+            value_ranges.append({"range": range_name, "values": values})
+        return {"valueRanges": value_ranges}
+
+    def get_lastUpdateTime(self):
+        row = self.replica._query(
+            "SELECT modified FROM sheets WHERE name = ?", (self.title,)
+        )
+        return row[0][0] if row else None
+
+
+class ReplicaClient:
+    """Local SQLite replica of spreadsheets with the gspread client surface.
+
+    Reads and writes go to an indexed SQLite file; pull and push sync it
+    explicitly with a real gspread client.
+    """
+
+    def __init__(self, path="replica.sqlite"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def _query(self, sql, params=()):
+        with self.lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    def open(self, name):
+        if not self._query("SELECT 1 FROM sheets WHERE name = ?", (name,)):
+            raise SpreadsheetNotFound(name)
+        return ReplicaSpreadsheet(self, name)
+
+    def create(self, name):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO sheets (name, modified) VALUES (?, ?)",
+                (name, now()),
+            )
+        return ReplicaSpreadsheet(self, name)
+
+    def _touch(self, worksheet_id, dirty=1, modified=None):
+        self.connection.execute(
+            "UPDATE worksheets SET dirty = ? WHERE id = ?", (dirty, worksheet_id)
+        )
+        self.connection.execute(
+            "UPDATE sheets SET modified = ? WHERE name = "
+            "(SELECT sheet FROM worksheets WHERE id = ?)",
+            (modified or now(), worksheet_id),
+        )
+
+    def _add_worksheet(self, sheet, title, rows, cols):
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO worksheets (sheet, title, rows, cols) VALUES (?, ?, ?, ?)",
+                (sheet, title, rows, cols),
+            )
+            self._touch(cursor.lastrowid)
+            return cursor.lastrowid
+
+    def _values(self, worksheet_id):
+        cells = self._query(
+            "SELECT row, col, value FROM cells WHERE worksheet_id = ? "
+            "ORDER BY row, col",
+            (worksheet_id,),
+        )
+        if not cells:
+            return []
+        rows = cells[-1][0] + 1
+        cols = max(col for _, col, _ in cells) + 1
+        values = [[""] * cols for _ in range(rows)]
+        for row, col, value in cells:
+            values[row][col] = value
+        return values
+
+    def _write(self, worksheet_id, blocks, dirty=1, modified=None):
+        """Writes (row, col, values) blocks in one transaction"""
+        upserts = []
+        deletes = []
+        max_row = max_col = 0
+        for top, left, values in blocks:
+            for i, row in enumerate(values):
+                for j, value in enumerate(row):
+                    value = cell_value(value)
+                    key = (worksheet_id, top + i, left + j)
+                    if value:
+                        upserts.append(key + (value,))
+                    else:
+                        deletes.append(key)
+                max_col = max(max_col, left + len(row))
+            max_row = max(max_row, top + len(values))
+
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO cells (worksheet_id, row, col, value) "
+                "VALUES (?, ?, ?, ?)",
+                upserts,
+            )
+            self.connection.executemany(
+                "DELETE FROM cells WHERE worksheet_id = ? AND row = ? AND col = ?",
+                deletes,
+            )
+            self.connection.execute(
+                "UPDATE worksheets SET rows = MAX(rows, ?), cols = MAX(cols, ?) "
+                "WHERE id = ?",
+                (max_row, max_col, worksheet_id),
+            )
+            self._touch(worksheet_id, dirty, modified)
+
+    def _clear(self, worksheet_id, dirty=1, modified=None):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM cells WHERE worksheet_id = ?", (worksheet_id,)
+            )
+            self._touch(worksheet_id, dirty, modified)
+
+    def pull(self, client, sheet, worksheets=None):
+        """Replaces the replica of sheet (or some of its worksheets) with the
+        remote content and returns the titles pulled."""
+        remote = client.open(sheet)
+        modified = last_update_time(remote) or now()
+        local = self.create(sheet)
+
+        if worksheets is None:
+            remote_worksheets = remote.worksheets()
+        else:
+            remote_worksheets = [remote.worksheet(title) for title in worksheets]
+
+        for remote_worksheet in remote_worksheets:
+            values = remote_worksheet.get_all_values()
+            try:
+                local_worksheet = local.worksheet(remote_worksheet.title)
+            except WorksheetNotFound:
+                local_worksheet = local.add_worksheet(
+                    remote_worksheet.title,
+                    rows=len(values),
+                    cols=max((len(row) for row in values), default=0),
+                )
+            self._clear(local_worksheet.id, dirty=0, modified=modified)
+            self._write(
+                local_worksheet.id, [(0, 0, values)], dirty=0, modified=modified
+            )
+
+        return [remote_worksheet.title for remote_worksheet in remote_worksheets]
+
+    def push(self, client, sheet):
+        """Writes locally changed worksheets of sheet to the remote
+        spreadsheet and returns the titles pushed."""
+        remote = client.open(sheet)
+        remote_worksheets = {
+            remote_worksheet.title: remote_worksheet
+            for remote_worksheet in remote.worksheets()
+        }
+        rows = self._query(
+            "SELECT id, title, rows, cols FROM worksheets "
+            "WHERE sheet = ? AND dirty = 1 ORDER BY id",
+            (sheet,),
+        )
+        for id, title, n_rows, n_cols in rows:
+            if title in remote_worksheets:
+                remote_worksheet = remote_worksheets[title]
+                remote_worksheet.clear()
+            else:
+                remote_worksheet = remote.add_worksheet(
+                    title=title, rows=str(n_rows), cols=str(n_cols)
+                )
+            remote_worksheet.update(range_name="A1", values=self._values(id))
+            with self.lock, self.connection:
+                self.connection.execute(
+                    "UPDATE worksheets SET dirty = 0 WHERE id = ?", (id,)
+                )
+
+        return [title for _, title, _, _ in rows]
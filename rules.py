@@ -0,0 +1,136 @@
+import numpy as np
+
+ROUNDS = 20
+MAX_AP = 4
+
+AP_OPTIONS = ["1AP", "2AP", "3AP", "4AP"]
+
+ACTIONS = [
+    "M_Walk",
+    "M_Run",
+    "M_Sprint",
+    "A_Quick",
+    "A_Normal",
+    "A_Steady",
+    "A_Charged",
+    "A_Dual",
+]
+
+AP_STA_MAP = {
+    "M_Walk": {"1AP": 0, "2AP": 0, "3AP": 0, "4AP": 0},
+    "M_Run": {"1AP": 1, "2AP": 2, "3AP": 3, "4AP": 3},
+    "M_Sprint": {"1AP": 3, "2AP": 4, "3AP": 7, "4AP": 7},
+    "A_Quick": {"2AP": 1},
+    "A_Normal": {"3AP": 1},
+    "A_Steady": {"4AP": 1},
+    "A_Charged": {"3AP": 1},
+    "A_Dual": {"3AP": 2},
+}
+
+DMG_MAP = {
+    "A_Quick": -6,
+    "A_Charged": 6,
+}
+
+ATT_MAP = {"A_Quick": -1, "A_Steady": 2, "A_Charged": -1, "A_Dual": -2}
+
+# (ms // 4, ms // 2, ms) coefficients of the movement for 1 to 4 AP
+MS_COEFFS = {
+    "M_Walk": [(1, 0, 0), (0, 1, 0), (1, 1, 0), (0, 0, 1)],
+    "M_Run": [(0, 1, 0), (0, 0, 1), (0, 1, 1), (0, 0, 2)],
+    "M_Sprint": [(0, 0, 1), (0, 0, 2), (0, 0, 3), (0, 0, 4)],
+}
+
+# MS and ATT penalty at exactly these STA values
+STA_PENALTIES = {5: 1, 3: 2, 1: 3}
+
+# STA penalty when this and last round's AP add up to these totals
+AP_PENALTIES = {7: 1, 8: 2}
+
+# movement_matrix names of the movement actions
+MOVES = {"walk": "M_Walk", "run": "M_Run", "sprint": "M_Sprint"}
+
+PASS = len(ACTIONS)  # action code of an empty step, every rule is zero
+
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+
+
+def ap_points(ap):
+    """Number of action points in an AP option such as "3AP"."""
+    return int(ap[0])
+
+
+def _compile():
+    """Rules as arrays indexed by (action code, AP points) or by STA/AP totals."""
+    shape = (len(ACTIONS) + 1, MAX_AP + 1)
+    valid = np.zeros(shape, dtype=bool)
+    sta_cost = np.zeros(shape, dtype=np.int16)
+    ms_coeffs = np.zeros(shape + (3,), dtype=np.int16)
+    att = np.zeros(len(ACTIONS) + 1, dtype=np.int16)
+    dmg = np.zeros(len(ACTIONS) + 1, dtype=np.int16)
+    attack = np.zeros(len(ACTIONS) + 1, dtype=bool)
+
+    for action, code in ACTION_CODES.items():
+        for ap, cost in AP_STA_MAP[action].items():
+            valid[code, ap_points(ap)] = True
+            sta_cost[code, ap_points(ap)] = cost
+        for ap, coeffs in enumerate(MS_COEFFS.get(action, []), start=1):
+            ms_coeffs[code, ap] = coeffs
+        att[code] = ATT_MAP.get(action, 0)
+        dmg[code] = DMG_MAP.get(action, 0)
+        attack[code] = action.startswith("A_")
+
+    # One past the last threshold so larger values clip onto a zero entry
+    sta_penalty = np.zeros(max(STA_PENALTIES) + 2, dtype=np.int16)
+    for sta, penalty in STA_PENALTIES.items():
+        sta_penalty[sta] = penalty
+    ap_penalty = np.zeros(2 * MAX_AP + 1, dtype=np.int16)
+    for total, penalty in AP_PENALTIES.items():
+        ap_penalty[total] = penalty
+
+    tables = (valid, sta_cost, ms_coeffs, att, dmg, attack, sta_penalty, ap_penalty)
+    for table in tables:
+        table.flags.writeable = False
+    return tables
+
+
+(
+    VALID,
+    STA_COST,
+    MS_COEFFS_TABLE,
+    ATT,
+    DMG,
+    ATTACK,
+    STA_PENALTY,
+    AP_PENALTY,
+) = _compile()
+
+
+def action_code(action):
+    """Code of action, PASS for unknown actions."""
+    return ACTION_CODES.get(action, PASS)
+
+
+def stamina_penalty(sta):
+    """MS and ATT penalty for scalar or array STA."""
+    return STA_PENALTY[np.clip(sta, 0, len(STA_PENALTY) - 1)]
+
+
+def ap_penalty(current_AP, last_turn_AP):
+    """STA penalty for scalar or array AP left this round and played last round."""
+    total = MAX_AP - np.asarray(current_AP) + last_turn_AP
+    return AP_PENALTY[np.clip(total, 0, len(AP_PENALTY) - 1)]
+
+
+def movement(ms, code, ap, sta=None):
+    """Movement of action code for ap points, vectorized over all arguments.
+
+    sta applies the stamina penalty to ms first.
+    """
+    ms_x = np.asarray(ms) - (0 if sta is None else stamina_penalty(sta))
+    coeffs = MS_COEFFS_TABLE[code, ap]
+    return (
+        coeffs[..., 0] * (ms_x // 4)
+        + coeffs[..., 1] * (ms_x // 2)
+        + coeffs[..., 2] * ms_x
+    )
@@ -0,0 +1,193 @@
+from collections import OrderedDict
+
+import numpy as np
+from grids import LONG, modified_distance
+
+# (row, col) of a quadrant cell at (depth, col) for the four cardinal directions
+QUADRANTS = [
+    lambda depth, col: (-depth, col),
+    lambda depth, col: (depth, col),
+    lambda depth, col: (col, -depth),
+    lambda depth, col: (col, depth),
+]
+
+
+def _round_ties_up(depth, num, den):
+    """round(depth * num / den) with ties rounded up."""
+    return (2 * depth * num + den) // (2 * den)
+
+
+def _round_ties_down(depth, num, den):
+    """round(depth * num / den) with ties rounded down."""
+    return -((den - 2 * depth * num) // (2 * den))
+
+
+def _lit_fraction(depth, col, start, end):
+    """Share of a cell's slope interval inside the lit interval start..end.
+
+    The cell spans slopes (2 * col - 1) / (2 * depth) to (2 * col + 1) /
+    (2 * depth), clipped to the quadrant's -1..1.
+    """
+    lo = max((2 * col - 1) / (2 * depth), -1.0)
+    hi = min((2 * col + 1) / (2 * depth), 1.0)
+    lit = min(hi, end[0] / end[1]) - max(lo, start[0] / start[1])
+    return max(lit, 0.0) / (hi - lo)
+
+
+def shadowcast(blocked, origin, reach, return_cover=False):
+    """Cells visible from origin within reach rows/columns of it.
+
+    Symmetric shadowcasting: each quadrant is scanned row by row and walls
+    narrow the visible slope interval instead of casting one ray per target.
+    Slopes are kept as integer fractions so the result is exact. Returns a
+    (2 * reach + 1) square window centred on origin; walls that are seen
+    count as visible and cells off the map are not.
+
+    With return_cover, also returns the cover of every cell: the share of
+    its slope interval that walls hide from origin, 0 for fully exposed
+    cells and 1 for cells that are not visible.
+    """
+    height, width = blocked.shape
+    row0, col0 = origin
+    visible = np.zeros((2 * reach + 1, 2 * reach + 1), dtype=bool)
+    visible[reach, reach] = True
+    lit = np.zeros(visible.shape, dtype=np.float32)
+    lit[reach, reach] = 1
+
+    for transform in QUADRANTS:
+
+        def is_wall(depth, col):
+            dr, dc = transform(depth, col)
+            r, c = row0 + dr, col0 + dc
+            return not (0 <= r < height and 0 <= c < width) or bool(blocked[r, c])
+
+        def reveal(depth, col, start, end):
+            dr, dc = transform(depth, col)
+            r, c = row0 + dr, col0 + dc
+            if 0 <= r < height and 0 <= c < width:
+                visible[reach + dr, reach + dc] = True
+                if not return_cover:
+                    return
+                # Axis and diagonal cells are scanned by two quadrants
+                lit[reach + dr, reach + dc] = max(
+                    lit[reach + dr, reach + dc],
+                    _lit_fraction(depth, col, start, end),
+                )
+
+        # rows to scan as (depth, start slope, end slope), slopes as (num, den)
+        rows = [(1, (-1, 1), (1, 1))]
+        while rows:
+            depth, start, end = rows.pop()
+            if depth > reach:
+                continue
+            lo = _round_ties_up(depth, *start)
+            hi = _round_ties_down(depth, *end)
+            prev_wall = None
+            for col in range(lo, hi + 1):
+                wall = is_wall(depth, col)
+                symmetric = (
+                    col * start[1] >= depth * start[0]
+                    and col * end[1] <= depth * end[0]
+                )
+                if wall or symmetric:
+                    reveal(depth, col, start, end)
+                if prev_wall and not wall:
+                    start = (2 * col - 1, 2 * depth)
+                if prev_wall is False and wall:
+                    rows.append((depth + 1, start, (2 * col - 1, 2 * depth)))
+                prev_wall = wall
+            if prev_wall is False:
+                rows.append((depth + 1, start, end))
+
+    if return_cover:
+        return visible, 1 - lit
+    return visible
+
+
+class SightMap:
+    """Obstacle grid answering cached line-of-sight queries.
+
+    Visibility windows are cached per (origin, version) with LRU eviction;
+    every change to the obstacles bumps version, so stale entries are never
+    served and simply age out.
+    """
+
+    def __init__(self, blocked, radius=LONG, maxsize=256):
+        self.blocked = np.array(blocked, dtype=bool)
+        self.radius = radius
+        self.reach = radius // 3
+        self.version = 0
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        axis = np.arange(-self.reach, self.reach + 1)
+        self.in_range = modified_distance(axis[:, None], axis[None, :]) <= radius
+
+    def set_blocked(self, cells, value=True):
+        """Marks (row, col) cells as blocking (or open with value=False)."""
+        cells = np.asarray(cells).reshape(-1, 2)
+        self.blocked[cells[:, 0], cells[:, 1]] = value
+        self.version += 1
+
+    def _windows(self, origin):
+        """Cached (visible, cover) windows of origin."""
+        key = (tuple(origin), self.version)
+        windows = self.cache.get(key)
+        if windows is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return windows
+
+        self.misses += 1
+        visible, cover = shadowcast(self.blocked, key[0], self.reach, return_cover=True)
+        visible &= self.in_range
+        cover[~visible] = 1
+        for window in (visible, cover):
+            window.flags.writeable = False
+        windows = self.cache[key] = (visible, cover)
+        if len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+        return windows
+
+    def visible(self, origin):
+        """Read-only window of cells visible from origin within radius.
+
+        The window spans radius // 3 cells around origin in every direction.
+        """
+        return self._windows(origin)[0]
+
+    def cover(self, origin):
+        """Read-only window of the cover of every cell against origin.
+
+        Same layout as visible; 0 is fully exposed, 1 not visible at all.
+        """
+        return self._windows(origin)[1]
+
+    def visible_window(self, origin, size):
+        """Visibility mask shaped like range_matrix(size, ...) around origin.
+
+        Cells beyond radius are not visible.
+        """
+        center = size // 2
+        window = np.zeros((2 * center + 1, 2 * center + 1), dtype=bool)
+        n = min(center, self.reach)
+        window[center - n : center + n + 1, center - n : center + n + 1] = self.visible(
+            origin
+        )[self.reach - n : self.reach + n + 1, self.reach - n : self.reach + n + 1]
+        return window
+
+    def line_of_sight(self, origin, target):
+        """Whether target can be seen from origin within radius."""
+        dr, dc = target[0] - origin[0], target[1] - origin[1]
+        if max(abs(dr), abs(dc)) > self.reach:
+            return False
+        return bool(self.visible(origin)[self.reach + dr, self.reach + dc])
+
+    def cover_at(self, origin, target):
+        """Cover of target against origin, 1 when it cannot be seen."""
+        dr, dc = target[0] - origin[0], target[1] - origin[1]
+        if max(abs(dr), abs(dc)) > self.reach:
+            return 1.0
+        return float(self.cover(origin)[self.reach + dr, self.reach + dc])
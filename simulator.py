@@ -0,0 +1,190 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from rules import (
+    ACTION_CODES,
+    ATT,
+    ATTACK,
+    DMG,
+    MAX_AP,
+    PASS,
+    ROUNDS,
+    STA_COST,
+    VALID,
+    ap_penalty,
+    ap_points,
+    movement,
+    stamina_penalty,
+)
+
+
+def encode_plan(plan):
+    """(action, AP) pairs such as ("M_Run", "2AP") as (code, points) pairs."""
+    return [(ACTION_CODES[action], ap_points(ap)) for action, ap in plan]
+
+
+class FixedPolicy:
+    """Plays the same plan of (action, AP) steps every round."""
+
+    def __init__(self, plan):
+        self.plan = encode_plan(plan)
+
+    def __call__(self, round_index, state, rng):
+        return self.plan
+
+
+class AlternatingPolicy:
+    """Cycles through plans, one plan per round."""
+
+    def __init__(self, *plans):
+        self.plans = [encode_plan(plan) for plan in plans]
+
+    def __call__(self, round_index, state, rng):
+        return self.plans[round_index % len(self.plans)]
+
+
+class RandomPolicy:
+    """Draws one of plans for every game and round with probabilities p."""
+
+    def __init__(self, plans, p=None):
+        plans = [encode_plan(plan) for plan in plans]
+        steps = max(len(plan) for plan in plans)
+        padded = np.array(
+            [plan + [(PASS, 0)] * (steps - len(plan)) for plan in plans],
+            dtype=np.intp,
+        ).reshape(len(plans), steps, 2)
+        self.codes = padded[..., 0]
+        self.ap = padded[..., 1]
+        self.p = p
+
+    def __call__(self, round_index, state, rng):
+        choice = rng.choice(len(self.codes), size=len(state["sta"]), p=self.p)
+        return [
+            (self.codes[choice, step], self.ap[choice, step])
+            for step in range(self.codes.shape[1])
+        ]
+
+
+class DiceDamage:
+    """Base damage of count dice with sides faces, usable as damage=."""
+
+    def __init__(self, sides=6, count=1):
+        self.sides = sides
+        self.count = count
+
+    def __call__(self, rng, size):
+        return rng.integers(1, self.sides + 1, (self.count, size)).sum(axis=0)
+
+
+def simulate_games(
+    policy, games, rounds=ROUNDS, sta=10, ms=10, init_sta=None, damage=None, seed=None
+):
+    """Plays games in parallel as arrays, one row per game.
+
+    sta, ms and init_sta may be scalars or per-game arrays; damage is an
+    optional callable (rng, size) giving the base damage of each attack.
+    Returns per-round arrays shaped (games, rounds).
+    """
+    rng = np.random.default_rng(seed)
+    sta = np.broadcast_to(np.asarray(sta, dtype=np.int32), games).copy()
+    ms = np.broadcast_to(np.asarray(ms, dtype=np.int32), games)
+    init_sta = sta.copy() if init_sta is None else np.broadcast_to(init_sta, games)
+    last_turn_AP = np.zeros(games, dtype=np.int32)
+    consecutive_passes = np.zeros(games, dtype=np.int32)
+
+    records = {
+        name: np.zeros((games, rounds), dtype=np.int32)
+        for name in ("sta", "ms", "att", "dmg", "attacks", "ap")
+    }
+
+    for round_index in range(rounds):
+        current_AP = np.full(games, MAX_AP, dtype=np.int32)
+        state = {"sta": sta, "current_AP": current_AP, "last_turn_AP": last_turn_AP}
+        moved = np.zeros(games, dtype=np.int32)
+        att_total = np.zeros(games, dtype=np.int32)
+        dmg_total = np.zeros(games, dtype=np.int32)
+        attacks = np.zeros(games, dtype=np.int32)
+
+        for codes, ap in policy(round_index, state, rng):
+            codes = np.broadcast_to(codes, games)
+            ap = np.broadcast_to(ap, games)
+
+            cost = STA_COST[codes, ap] + ap_penalty(current_AP, last_turn_AP)
+            played = VALID[codes, ap] & (ap <= current_AP) & (sta >= cost)
+
+            moved += played * movement(ms, codes, ap, sta)
+
+            sta -= played * cost
+            current_AP -= played * ap
+
+            attacked = played & ATTACK[codes]
+            attacks += attacked
+            att_total += attacked * (ATT[codes] - stamina_penalty(sta))
+            base = damage(rng, games) if damage is not None else 0
+            dmg_total += attacked * (DMG[codes] + base)
+
+        ap_played = MAX_AP - current_AP
+        passed = ap_played == 0
+        consecutive_passes = np.where(passed, consecutive_passes + 1, 0)
+        rest_stamina = np.where(consecutive_passes == 1, 1, 2) * passed
+        sta = np.where(passed, np.minimum(sta + rest_stamina, init_sta), sta)
+        last_turn_AP = ap_played
+
+        records["sta"][:, round_index] = sta
+        records["ms"][:, round_index] = moved
+        records["att"][:, round_index] = att_total
+        records["dmg"][:, round_index] = dmg_total
+        records["attacks"][:, round_index] = attacks
+        records["ap"][:, round_index] = ap_played
+
+    return records
+
+
+def _simulate_shard(args):
+    policy, games, kwargs = args
+    return simulate_games(policy, games, **kwargs)
+
+
+def simulate(policy, games, processes=None, shards=None, seed=None, **kwargs):
+    """simulate_games, optionally sharded across a process pool.
+
+    Policies and damage callables must be picklable (module-level classes
+    such as FixedPolicy or DiceDamage) when processes is set.
+    """
+    if not processes:
+        return simulate_games(policy, games, seed=seed, **kwargs)
+
+    shards = shards or processes
+    seeds = np.random.SeedSequence(seed).spawn(shards)
+    jobs = []
+    for rows, shard_seed in zip(np.array_split(np.arange(games), shards), seeds):
+        if not len(rows):
+            continue
+        shard_kwargs = dict(kwargs, seed=shard_seed)
+        # Per-game arrays follow their rows into the shard
+        for name in ("sta", "ms", "init_sta"):
+            if np.ndim(kwargs.get(name)) == 1:
+                shard_kwargs[name] = np.asarray(kwargs[name])[rows]
+        jobs.append((policy, len(rows), shard_kwargs))
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        results = list(executor.map(_simulate_shard, jobs))
+
+    return {
+        name: np.concatenate([result[name] for result in results])
+        for name in results[0]
+    }
+
+
+def summarize(records, percentiles=(10, 50, 90)):
+    """Per-round mean and percentiles of every recorded metric."""
+    frames = {}
+    for name, values in records.items():
+        stats = {"mean": values.mean(axis=0)}
+        for q, row in zip(percentiles, np.percentile(values, percentiles, axis=0)):
+            stats[f"p{q}"] = row
+        frames[name] = pd.DataFrame(
+            stats, index=pd.RangeIndex(1, values.shape[1] + 1, name="round")
+        )
+    return pd.concat(frames, axis=1)
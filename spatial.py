@@ -0,0 +1,123 @@
+import numpy as np
+from grids import LONG, RANGE_BANDS, classify, modified_distance
+
+
+class SpatialIndex:
+    """Grid buckets over unit positions for radius and range-band queries.
+
+    Buckets are cell_size cells wide; the default covers the long range
+    (3 per straight step), so a long-range query touches at most 3x3 buckets.
+    Distances use the 4/3 metric of range_matrix.
+    """
+
+    def __init__(self, positions, cell_size=LONG // 3 + 1):
+        self.positions = np.asarray(positions, dtype=np.int32).reshape(-1, 2)
+        self.cell_size = cell_size
+
+        keys = self.positions // cell_size
+        self.origin = keys.min(axis=0) if len(keys) else np.zeros(2, dtype=np.int32)
+        keys = keys - self.origin
+        self.shape = keys.max(axis=0) + 1 if len(keys) else np.ones(2, dtype=np.int32)
+
+        flat = keys[:, 0] * self.shape[1] + keys[:, 1]
+        self.order = np.argsort(flat, kind="stable")
+        self.starts = np.searchsorted(
+            flat[self.order], np.arange(self.shape[0] * self.shape[1] + 1)
+        )
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _candidates(self, lo, hi):
+        """Units in the buckets between lo and hi, inclusive."""
+        width = self.shape[1]
+        return np.concatenate(
+            [
+                self.order[
+                    self.starts[row * width + lo[1]] : self.starts[
+                        row * width + hi[1] + 1
+                    ]
+                ]
+                for row in range(lo[0], hi[0] + 1)
+            ]
+        )
+
+    def pairs_within(self, points, radius):
+        """All (query, unit, distance) with distance <= radius, as arrays.
+
+        Queries sharing the same bucket window are resolved together with one
+        vectorized distance matrix. Results are sorted by query then distance.
+        """
+        points = np.asarray(points, dtype=np.int32).reshape(-1, 2)
+        empty = np.zeros(0, dtype=np.intp)
+        if not len(points) or not len(self):
+            return empty, empty, empty.astype(np.int32)
+
+        # 3 * max(|dx|, |dy|) <= distance bounds the search square
+        reach = radius // 3
+        lo = np.maximum((points - reach) // self.cell_size - self.origin, 0)
+        hi = np.minimum(
+            (points + reach) // self.cell_size - self.origin, self.shape - 1
+        )
+        windows, group = np.unique(np.hstack([lo, hi]), axis=0, return_inverse=True)
+        group = group.ravel()
+
+        queries, units, distances = [], [], []
+        for index, window in enumerate(windows):
+            if (window[:2] > window[2:]).any():
+                continue
+            query = np.flatnonzero(group == index)
+            candidates = self._candidates(window[:2], window[2:])
+            if not len(candidates):
+                continue
+
+            offset = points[query, None, :] - self.positions[None, candidates, :]
+            distance = modified_distance(offset[..., 0], offset[..., 1])
+            q, c = np.nonzero(distance <= radius)
+            queries.append(query[q])
+            units.append(candidates[c])
+            distances.append(distance[q, c])
+
+        if not queries:
+            return empty, empty, empty.astype(np.int32)
+        queries, units, distances = (
+            np.concatenate(queries),
+            np.concatenate(units),
+            np.concatenate(distances).astype(np.int32),
+        )
+        order = np.lexsort((units, distances, queries))
+        return queries[order], units[order], distances[order]
+
+    def blasts(self, points, half, full):
+        """Units caught by explosions at points, as (query, unit, zone) arrays.
+
+        zone is 0 within the half radius and 1 between half and full.
+        """
+        queries, units, distances = self.pairs_within(points, max(half, full))
+        zones = classify(distances, [half, full])
+        hit = zones < 2
+        return queries[hit], units[hit], zones[hit]
+
+    def blast(self, point, half, full):
+        """Units within the half radius and units within the full radius only."""
+        _, units, zones = self.blasts([point], half, full)
+        return units[zones == 0], units[zones == 1]
+
+    def targets_many(self, shooters):
+        """Targets in range of many shooters, as (shooter, unit, band, distance).
+
+        shooters are unit indices; band indexes RANGE_BANDS (melee to long).
+        """
+        shooters = np.asarray(shooters, dtype=np.intp).reshape(-1)
+        queries, units, distances = self.pairs_within(
+            self.positions[shooters], RANGE_BANDS[-1]
+        )
+        queries = shooters[queries]
+        other = units != queries
+        queries, units, distances = queries[other], units[other], distances[other]
+        return queries, units, classify(distances, RANGE_BANDS), distances
+
+    def targets(self, shooter):
+        """Targets in range of one shooter, as (unit, band, distance) arrays."""
+        _, units, bands, distances = self.targets_many([shooter])
+        return units, bands, distances
@@ -0,0 +1,62 @@
+import asyncio
+import functools
+from contextlib import ExitStack, contextmanager
+
+
+@contextmanager
+def hold_sync(*widgets):
+    """Holds front-end syncing of all widgets until the block exits.
+
+    Observers still run on every assignment, but each widget sends its
+    changed state to the front-end once, in a single message, at the end.
+    Nested holds are merged into the outermost one.
+    """
+    with ExitStack() as stack:
+        for widget in widgets:
+            stack.enter_context(widget.hold_sync())
+        yield
+
+
+def synced(widgets):
+    """Decorates a widget handler to run inside hold_sync(*widgets).
+
+    widgets is read on every call, so a list can be filled in after the
+    handlers that use it are defined.
+    """
+
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            with hold_sync(*widgets):
+                return handler(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def debounce(wait):
+    """Decorates a handler to run only once calls stop for wait seconds.
+
+    Only the last call's arguments are used. Without a running event loop
+    (outside a kernel) the handler runs immediately.
+    """
+
+    def decorator(handler):
+        pending = None
+
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            nonlocal pending
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return handler(*args, **kwargs)
+
+            if pending is not None:
+                pending.cancel()
+            pending = loop.call_later(wait, lambda: handler(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,88 @@
+from helpers import SheetCache
+
+
+class FakeSpreadsheet:
+    """In-process stand-in for a gspread Spreadsheet."""
+
+    def __init__(self, worksheets, revision="r1"):
+        self.worksheets = worksheets
+        self.revision = revision
+        self.batch_gets = 0
+
+    def get_lastUpdateTime(self):
+        return self.revision
+
+    def values_batch_get(self, ranges):
+        self.batch_gets += 1
+        return {
+            "valueRanges": [
+                {"range": name, "values": self.worksheets[name.strip("'")]}
+                for name in ranges
+            ]
+        }
+
+
+class FakeClient:
+    def __init__(self, sheets):
+        self.sheets = sheets
+        self.opens = 0
+
+    def open(self, sheet):
+        self.opens += 1
+        return self.sheets[sheet]
+
+
+def make_client():
+    spreadsheet = FakeSpreadsheet(
+        {
+            "Skills": [["Name", "Value"], ["Stealth", "3"], ["Climb", "1"]],
+            "Items": [["Name", "Value"], ["Rope"]],
+        }
+    )
+    return FakeClient({"Sheet": spreadsheet}), spreadsheet
+
+
+def test_sheet_cache_counts_hits_and_misses(tmp_path):
+    client, spreadsheet = make_client()
+    cache = SheetCache(path=str(tmp_path), ttl=300, fmt="pickle")
+
+    dfs = cache.get_dfs(client, "Sheet", ["Skills", "Items"])
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert spreadsheet.batch_gets == 1
+    assert dfs["Skills"]["Name"].tolist() == ["Stealth", "Climb"]
+    assert dfs["Items"].values.tolist() == [["Rope", ""]]
+
+    # Fresh entries are served without opening the spreadsheet
+    df = cache.get_df(client, "Sheet", "Skills")
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert client.opens == 1
+    assert df.equals(dfs["Skills"])
+
+
+def test_sheet_cache_revalidates_stale_entries(tmp_path):
+    client, spreadsheet = make_client()
+    cache = SheetCache(path=str(tmp_path), ttl=0, fmt="pickle")
+    cache.get_df(client, "Sheet", "Skills")
+
+    # Stale but unchanged: one open to check the revision, no download
+    cache.get_df(client, "Sheet", "Skills")
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert spreadsheet.batch_gets == 1
+
+    spreadsheet.revision = "r2"
+    spreadsheet.worksheets["Skills"] = [["Name", "Value"], ["Stealth", "4"]]
+    df = cache.get_df(client, "Sheet", "Skills")
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert spreadsheet.batch_gets == 2
+    assert df["Value"].tolist() == ["4"]
+
+
+def test_sheet_cache_invalidate(tmp_path):
+    client, spreadsheet = make_client()
+    cache = SheetCache(path=str(tmp_path), ttl=300, fmt="pickle")
+    cache.get_df(client, "Sheet", "Skills")
+
+    cache.invalidate("Sheet", "Skills")
+    cache.get_df(client, "Sheet", "Skills")
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert spreadsheet.batch_gets == 2
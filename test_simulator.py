@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from engine import TurnEngine
+from simulator import AlternatingPolicy, FixedPolicy, simulate_games
+
+PLANS = [
+    [("M_Walk", "1AP"), ("A_Normal", "3AP")],
+    [("A_Charged", "3AP"), ("A_Quick", "1AP"), ("M_Run", "1AP")],
+    [],
+    [("M_Sprint", "2AP"), ("A_Quick", "2AP"), ("A_Dual", "3AP")],
+    [("A_Steady", "4AP")],
+]
+
+
+def play(policy_plans, rounds, sta, ms):
+    """Per-round records of one game played step by step on a TurnEngine."""
+    engine = TurnEngine(sta=sta, ms=ms)
+    records = {name: [] for name in ("sta", "ms", "att", "dmg", "attacks", "ap")}
+    for round_index in range(rounds):
+        moved = att = dmg = attacks = 0
+        for action, ap in policy_plans[round_index % len(policy_plans)]:
+            if ap not in engine.valid_ap_options(action):
+                continue
+            record = engine.do_action(action, ap)
+            if record is None:
+                continue
+            moved += record["MS"]
+            if action.startswith("A_"):
+                attacks += 1
+                att += record["ATT"]
+                dmg += record["DMG"]
+        summary = engine.end_round()
+        records["sta"].append(summary["sta"])
+        records["ms"].append(moved)
+        records["att"].append(att)
+        records["dmg"].append(dmg)
+        records["attacks"].append(attacks)
+        records["ap"].append(summary["total_ap_played"])
+    return records
+
+
+@pytest.mark.parametrize("sta", [1, 4, 10])
+@pytest.mark.parametrize("plans", [PLANS[:1], PLANS[1:2], PLANS[1:], PLANS])
+def test_simulator_matches_engine(plans, sta):
+    rounds, ms = 6, 8
+    policy = AlternatingPolicy(*plans) if len(plans) > 1 else FixedPolicy(plans[0])
+    simulated = simulate_games(policy, games=3, rounds=rounds, sta=sta, ms=ms)
+    expected = play(plans, rounds, sta, ms)
+    for name, values in expected.items():
+        assert (simulated[name] == np.array(values)).all(), name